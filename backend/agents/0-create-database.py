@@ -1,5 +1,4 @@
 from uagents import Agent, Context, Model
-import json
 from pathlib import Path
 import asyncio
 from typing import List
@@ -8,6 +7,7 @@ import sys
 # Add parent directory to path to import data_service
 sys.path.append(str(Path(__file__).parent.parent))
 from data_service import data_service
+from storefronts import load_vacant_storefronts, storefront_business_type
 
 # this will create the dataset by repeatidly calling orchestrator agent on each vacant rental property
 
@@ -18,6 +18,8 @@ class ScoreRequest(Model):
     latitude: float
     longitude: float
     rent_estimate: float
+    full_breakdown: bool = False  # Every nearby site/station instead of the k nearest
+    score_only: bool = False  # Breakdown lists not needed (may be answered from the score raster)
 
 # Rent estimates by borough (monthly commercial rent per sqft * average 1000 sqft)
 BOROUGH_RENT_ESTIMATES = {
@@ -47,54 +49,6 @@ inputter = Agent(
 # Use the actual agent address derived from the seed phrase
 ORCHESTRATOR_ADDRESS = "agent1q2wva7fjhjqfklv8sna6q3ftcaf32pt7fev5q9w0qwn5earml3a8qz24n4f"
 
-def load_vacant_storefronts(limit=5):
-    """Load vacant storefront data from geojson file"""
-    data_path = Path(__file__).parent / 'data' / 'Storefronts_Vacant_or_Not.geojson'
-    
-    try:
-        with open(data_path, 'r') as f:
-            data = json.load(f)
-        
-        vacant_storefronts = []
-        for feature in data.get('features', []):
-            if not feature:
-                continue
-                
-            props = feature.get('properties') or {}
-            geom = feature.get('geometry') or {}
-            
-            # Check if vacant (vacant_on_12_31 == 'Y' or == 'Yes')
-            vacant_status = props.get('vacant_on_12_31')
-            if vacant_status in ['Y', 'Yes']:
-                # Get coordinates
-                coords = geom.get('coordinates', [])
-                if len(coords) >= 2 and coords[0] and coords[1]:
-                    try:
-                        storefront = {
-                            'address': props.get('property_street_address_or', 'Unknown Address'),
-                            'borough': props.get('borough', 'MANHATTAN'),
-                            'neighborhood': props.get('nbhd') or props.get('nta') or 'Unknown',
-                            'latitude': float(coords[1]),
-                            'longitude': float(coords[0]),
-                            'business_activity': props.get('primary_business_activity', 'retail'),
-                            'zip_code': props.get('zip_code', ''),
-                        }
-                        vacant_storefronts.append(storefront)
-                        
-                        if len(vacant_storefronts) >= limit:
-                            break
-                    except (ValueError, TypeError) as e:
-                        # Skip invalid coordinates
-                        continue
-        
-        return vacant_storefronts
-    except Exception as e:
-        print(f"Error loading vacant storefronts: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
-
-
 def get_rent_estimate(storefront: dict) -> float:
     """Get rent estimate using data_service API or fallback to hardcoded values"""
     lat = storefront['latitude']
@@ -143,9 +97,7 @@ async def startup_handler(ctx: Context):
         target_demo = BOROUGH_DEMOGRAPHICS.get(borough, 'general public')
         
         # Determine business type (default to retail if not specified)
-        business_type = storefront.get('business_activity', 'retail')
-        if not business_type or business_type.lower() in ['', 'none', 'unknown']:
-            business_type = 'retail'
+        business_type = storefront_business_type(storefront)
         
         # Create and send the score request
         score_request = ScoreRequest(
@@ -18,6 +18,8 @@ class ScoreRequest(Model):
     latitude: float
     longitude: float
     rent_estimate: float # monthly
+    full_breakdown: bool = False  # Every nearby site/station instead of the k nearest
+    score_only: bool = False  # Breakdown lists not needed (may be answered from the score raster)
 
 class RevenueRequest(Model):
     business_type: str
@@ -198,13 +200,15 @@ async def handle_score_request(ctx: Context, sender: str, msg: ScoreRequest):
         "breakdown": {
             "foot_traffic": {
                 "score": int,
-                "nearby_locations": list,
+                "nearby_locations": list,   # k nearest, nearest first
+                "other_locations": dict,    # summary of the rest (omitted with full_breakdown)
                 "average_pedestrians": int,
                 "count": int
             },
             "transit_access": {
                 "score": int,
-                "nearby_stations": list,
+                "nearby_stations": list,    # k nearest, nearest first
+                "other_stations": dict,     # summary of the rest (omitted with full_breakdown)
                 "count": int
             }
         }
@@ -272,7 +276,8 @@ async def handle_score_request(ctx: Context, sender: str, msg: ScoreRequest):
         target_demo=msg.target_demo,
         latitude=msg.latitude,
         longitude=msg.longitude,
-        rent_estimate=msg.rent_estimate
+        rent_estimate=msg.rent_estimate,
+        full_breakdown=msg.full_breakdown
     )
     
     ctx.logger.info(f"Sending message to location_scout at {location_scout_address}")
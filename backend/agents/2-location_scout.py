@@ -1,8 +1,18 @@
 from uagents import Agent, Context, Model
+import heapq
 import json
 import os
+import sys
 from math import radians, cos, sin, asin, sqrt
 from pathlib import Path
+import numpy as np
+from scout_datasets import PedestrianSites, SubwayStations, ScoutData, dataset_version, haversine_np
+from dataset_cache import load_datasets
+from dataset_watcher import DatasetWatcher
+from scoring_pool import ScoringPool
+from score_raster import ScoreRaster, build_raster
+from geohash_utils import geohash_encode
+from memo_cache import TTLLRUCache
 
 # Try to use AWS S3 data service, fallback to local files
 try:
@@ -17,38 +27,123 @@ except Exception as e:
     USE_AWS_DATA = False
     data_service = None
 
-# Load data from S3 or local files
-subway_data = []
-pedestrian_data = None
+DATA_DIR = Path(__file__).parent / "data"
+PEDESTRIAN_FILE = DATA_DIR / "Bi-Annual_Pedestrian_Counts.geojson"
+SUBWAY_FILE = DATA_DIR / "subway_stations.json"
 
-if USE_AWS_DATA and data_service:
-    try:
-        subway_data = data_service.get_subway_stations() or []
-        # Get GeoJSON pedestrian data
-        pedestrian_data = data_service.get_pedestrian_counts_geojson()
-        # Ensure it's in GeoJSON format
-        if not pedestrian_data or not isinstance(pedestrian_data, dict):
-            pedestrian_data = {"features": []}
-        elif 'features' not in pedestrian_data:
-            pedestrian_data = {"features": []}
-        print("✅ Loaded data from AWS S3")
-    except Exception as e:
-        print(f"⚠️  Error loading from S3: {e}. Falling back to local files.")
-        USE_AWS_DATA = False
-
-if not USE_AWS_DATA:
-    # Fallback to local files
-    data_dir = Path(__file__).parent / "data"
+# Scoring mode: "exact" computes every request, "raster" answers score-only requests
+# (score_only=True) from the precomputed score raster
+SCORE_MODE = os.getenv("LOCATION_SCOUT_SCORE_MODE", "exact")
+
+# Seconds between checks for updated datasets (0 disables hot reload)
+RELOAD_INTERVAL = float(os.getenv("LOCATION_SCOUT_RELOAD_INTERVAL", "60"))
+
+def load_score_raster(version):
+    """Precomputed score raster for the dataset version, if raster mode is enabled"""
+    if SCORE_MODE != "raster":
+        return None
+    raster = ScoreRaster.load()
+    if raster is None:
+        print("⚠️  Score raster not found (run with --build-raster). Using exact scoring.")
+    elif raster.dataset_version != version:
+        print("⚠️  Score raster was built from different datasets. Using exact scoring.")
+        raster = None
+    else:
+        print("✅ Loaded precomputed score raster")
+    return raster
+
+def load_scout_data(strict=False):
+    """
+    Load and pre-process the pedestrian and subway datasets from S3 or local files
+    With strict=True load errors are raised instead of falling back to empty
+    datasets (used by hot reload so a bad update never replaces good data)
+    """
+    sites = stations = None
+    
+    if USE_AWS_DATA and data_service:
+        try:
+            subway_data = data_service.get_subway_stations() or []
+            # Get GeoJSON pedestrian data
+            pedestrian_data = data_service.get_pedestrian_counts_geojson()
+            # Ensure it's in GeoJSON format
+            if not pedestrian_data or not isinstance(pedestrian_data, dict):
+                pedestrian_data = {"features": []}
+            elif 'features' not in pedestrian_data:
+                pedestrian_data = {"features": []}
+            sites = PedestrianSites.from_geojson(pedestrian_data)
+            stations = SubwayStations.from_records(subway_data)
+            print("✅ Loaded data from AWS S3")
+        except Exception as e:
+            if strict:
+                raise
+            print(f"⚠️  Error loading from S3: {e}. Falling back to local files.")
+    
+    if sites is None:
+        # Fallback to local files, memory-mapped from the binary dataset cache
+        try:
+            sites, stations = load_datasets(PEDESTRIAN_FILE, SUBWAY_FILE)
+            print("✅ Loaded data from local files")
+        except Exception as e:
+            if strict:
+                raise
+            print(f"⚠️  Error loading local data: {e}")
+            sites = PedestrianSites.from_geojson({"features": []})
+            stations = SubwayStations.from_records([])
+    
+    version = dataset_version(sites, stations)
+    return ScoutData(sites, stations, version, load_score_raster(version))
+
+def dataset_fingerprint():
+    """Cheap change marker for the data sources (None when it cannot be determined)"""
+    if USE_AWS_DATA and data_service:
+        get_etags = getattr(data_service, "get_dataset_etags", None)
+        return tuple(get_etags()) if get_etags else None
     try:
-        with open(data_dir / "subway_stations.json") as f:
-            subway_data = json.load(f)
-        with open(data_dir / "Bi-Annual_Pedestrian_Counts.geojson") as f:
-            pedestrian_data = json.load(f)
-        print("✅ Loaded data from local files")
-    except Exception as e:
-        print(f"⚠️  Error loading local data: {e}")
-        subway_data = []
-        pedestrian_data = {"features": []}
+        return tuple((path.stat().st_mtime_ns, path.stat().st_size) for path in (PEDESTRIAN_FILE, SUBWAY_FILE))
+    except OSError:
+        return None
+
+def reload_datasets():
+    """Rebuild the datasets and swap them in as one snapshot"""
+    global datasets
+    snapshot = load_scout_data(strict=True)
+    if snapshot.version != datasets.version:
+        # Single reference assignment: in-flight requests keep the snapshot they started with
+        datasets = snapshot
+        print(f"🔄 Reloaded location datasets (version {snapshot.version}, counts {', '.join(snapshot.sites.count_fields)})")
+
+# Current datasets; handlers read this once per request and never mutate it
+datasets = load_scout_data()
+dataset_watcher = DatasetWatcher(dataset_fingerprint, reload_datasets, RELOAD_INTERVAL, name="location-scout-datasets")
+
+# Memo of exact location scores keyed by geohash of the coordinates (precision 0 disables)
+SCORE_MEMO_PRECISION = int(os.getenv("LOCATION_SCOUT_MEMO_PRECISION", "9"))  # ~5 m cells
+SCORE_MEMO_TTL = float(os.getenv("LOCATION_SCOUT_MEMO_TTL", "86400"))
+SCORE_MEMO_SIZE = int(os.getenv("LOCATION_SCOUT_MEMO_SIZE", "10000"))
+SCORE_MEMO_LOG_EVERY = int(os.getenv("LOCATION_SCOUT_MEMO_LOG_EVERY", "100"))  # Lookups between stats logs (0 disables)
+score_memo = TTLLRUCache(max_entries=SCORE_MEMO_SIZE, ttl=SCORE_MEMO_TTL)
+score_memo_version = datasets.version
+score_memo_lookups = 0
+
+# Search radii (miles)
+FOOT_TRAFFIC_RADIUS = 0.25
+TRANSIT_RADIUS = 0.5
+METERS_PER_MILE = 1609.344
+
+# Slack (miles) for the vectorized prefilter before the exact scalar distance check
+DISTANCE_EPSILON = 1e-9
+
+# Max distance matrix cells computed at once by calculate_location_score_batch (8 bytes each)
+BATCH_BLOCK_ELEMENTS = int(os.getenv("LOCATION_SCOUT_BATCH_BLOCK", "262144"))
+
+# Nearby pedestrian sites / stations listed per breakdown unless full_breakdown is requested
+BREAKDOWN_TOP_K = int(os.getenv("LOCATION_SCOUT_BREAKDOWN_TOP_K", "5"))
+
+# Worker processes for large batches (0 scores every batch on the event loop)
+SCORING_WORKERS = int(os.getenv("LOCATION_SCOUT_WORKERS", str(os.cpu_count() or 1)))
+# Batch size from which scoring goes to the pool; smaller batches (and single
+# scores, ~0.2 ms each) are cheaper inline than the ~40 ms of pool IPC
+SCORING_POOL_MIN_POINTS = int(os.getenv("LOCATION_SCOUT_POOL_MIN_POINTS", "250"))
 
 # Agent configuration - supports Agentverse deployment
 AGENT_ENDPOINT = os.getenv("LOCATION_SCOUT_ENDPOINT", "http://localhost:8001/submit")
@@ -82,12 +177,24 @@ class ScoreRequest(Model):
     latitude: float
     longitude: float
     rent_estimate: float
+    full_breakdown: bool = False  # Every nearby site/station instead of the k nearest
+    score_only: bool = False  # Breakdown lists not needed (may be answered from the score raster)
 
 class ScoreResponse(Model):
     score: int
     confidence: str 
     breakdown: dict = {}
 
+class BatchScoreRequest(Model):
+    business_type: str
+    target_demo: str
+    points: list  # [[latitude, longitude], ...]
+    full_breakdown: bool = False
+    score_only: bool = False
+
+class BatchScoreResponse(Model):
+    results: list  # One {"score", "confidence", "breakdown"} per point, in request order
+
 
 # Use the actual agent address derived from the seed phrase
 ORCHESTRATOR_ADDRESS = "agent1q2wva7fjhjqfklv8sna6q3ftcaf32pt7fev5q9w0qwn5earml3a8qz24n4f"
@@ -95,23 +202,34 @@ ORCHESTRATOR_ADDRESS = "agent1q2wva7fjhjqfklv8sna6q3ftcaf32pt7fev5q9w0qwn5earml3
 @location_scout.on_event("startup")
 async def startup_handler(ctx : Context):
     ctx.logger.info(f'My name is {ctx.agent.name} and my address  is {ctx.agent.address}')
+    # Fork the scoring workers before the watcher thread exists
+    scoring_pool.start()
+    dataset_watcher.start()
     # Register the orchestrator's endpoint for local communication
     ctx.logger.info(f'Attempting to send message to orchestrator at {ORCHESTRATOR_ADDRESS}')
     await ctx.send(ORCHESTRATOR_ADDRESS, Message(message = 'Hi Orchestrator, fuck fetch.ai lol'))
 
 
+@location_scout.on_event("shutdown")
+async def shutdown_handler(ctx: Context):
+    dataset_watcher.stop()
+    scoring_pool.shutdown(wait=False)
+
+
 @location_scout.on_message(model=ScoreRequest)
 async def handle_message(ctx: Context, sender: str, scoreRequest: ScoreRequest):
     ctx.logger.info(f'I have received a request for {scoreRequest.neighborhood}')
     
     # Calculate location score with all factors
-    location_result = calculate_location_score(
+    location_result = score_location(
         scoreRequest.neighborhood, 
         scoreRequest.business_type, 
         scoreRequest.target_demo,
         scoreRequest.latitude,
-        scoreRequest.longitude
+        scoreRequest.longitude,
+        details=not scoreRequest.score_only
     )
+    location_result = bounded_result(location_result, full=scoreRequest.full_breakdown)
     
     final_score = location_result['score']
     
@@ -128,71 +246,64 @@ async def handle_message(ctx: Context, sender: str, scoreRequest: ScoreRequest):
         )
     )
 
-def calculate_foot_traffic(lat, lng):
+@location_scout.on_message(model=BatchScoreRequest)
+async def handle_batch(ctx: Context, sender: str, batchRequest: BatchScoreRequest):
+    ctx.logger.info(f'I have received a batch request for {len(batchRequest.points)} locations')
+    
+    snapshot = datasets
+    results = [None] * len(batchRequest.points)
+    if batchRequest.score_only:
+        results = [raster_location_score(lat, lng, snapshot) for lat, lng in batchRequest.points]
+    pending = [i for i, result in enumerate(results) if result is None]
+    if len(pending) >= SCORING_POOL_MIN_POINTS:
+        scored, queued, ran = await scoring_pool.run(
+            snapshot.version, 'batch', [batchRequest.points[i] for i in pending]
+        )
+        ctx.logger.info(f'Batch scored in pool: {len(pending)} points, queued {queued * 1000:.1f} ms, ran {ran * 1000:.1f} ms')
+    elif pending:
+        scored = calculate_location_score_batch([batchRequest.points[i] for i in pending], snapshot)
+    if pending:
+        for i, result in zip(pending, scored):
+            results[i] = result
+    results = [bounded_result(result, full=batchRequest.full_breakdown) for result in results]
+    
+    ctx.logger.info(f'Sending back {len(results)} location scores')
+    await ctx.send(sender, BatchScoreResponse(results=results))
+
+def calculate_foot_traffic(lat, lng, sites=None):
     """
     Calculate foot traffic based on nearby pedestrian counting locations
     Returns score 0-100 based on average pedestrian counts within 0.25 miles
     """
-    nearby_counts = []
+    if sites is None:
+        sites = datasets.sites
     
-    for feature in pedestrian_data['features']:
-        # Extract coordinates from GeoJSON
-        coords = feature['geometry']['coordinates']
-        count_lng, count_lat = coords[0], coords[1]
-        
-        # Calculate distance
-        distance = haversine(lat, lng, count_lat, count_lng)
-        
-        # Include locations within 0.25 miles
-        if distance <= 0.25:
-            props = feature['properties']
-            
-            # Extract recent count data (most recent available periods)
-            # Use oct24 (October 2024) and may25 (May 2025) as most recent
-            recent_counts = []
-            
-            # October 2024 data
-            if 'oct24_am' in props and props['oct24_am'] != "0":
-                try:
-                    recent_counts.append(int(props['oct24_am']))
-                except (ValueError, TypeError):
-                    pass
-            if 'oct24_pm' in props and props['oct24_pm'] != "0":
-                try:
-                    recent_counts.append(int(props['oct24_pm']))
-                except (ValueError, TypeError):
-                    pass
-            if 'oct24_md' in props and props['oct24_md'] != "0":
-                try:
-                    recent_counts.append(int(props['oct24_md']))
-                except (ValueError, TypeError):
-                    pass
-            
-            # May 2025 data
-            if 'may25_am' in props and props['may25_am'] != "0":
-                try:
-                    recent_counts.append(int(props['may25_am']))
-                except (ValueError, TypeError):
-                    pass
-            if 'may25_pm' in props and props['may25_pm'] != "0":
-                try:
-                    recent_counts.append(int(props['may25_pm']))
-                except (ValueError, TypeError):
-                    pass
-            if 'may25_md' in props and props['may25_md'] != "0":
-                try:
-                    recent_counts.append(int(props['may25_md']))
-                except (ValueError, TypeError):
-                    pass
-            
-            if recent_counts:
-                avg_count = sum(recent_counts) / len(recent_counts)
-                nearby_counts.append({
-                    'location': props.get('street_nam', 'Unknown'),
-                    'distance': round(distance, 2),
-                    'avg_count': round(avg_count),
-                    'borough': props.get('borough', 'Unknown')
-                })
+    # Vectorized prefilter over all sites with recent counts (newest two periods)
+    distances = haversine_np(lat, lng, sites.lat, sites.lng)
+    candidates = np.flatnonzero(sites.has_counts & (distances <= FOOT_TRAFFIC_RADIUS + DISTANCE_EPSILON))
+    return foot_traffic_from_candidates(lat, lng, candidates, sites)
+
+def foot_traffic_from_candidates(lat, lng, candidates, sites):
+    """Build the foot traffic result from prefiltered candidate site indices"""
+    # Re-check the few candidates with the scalar formula so cutoffs and rounding
+    # match the per-feature loop exactly
+    nearby_idx = []
+    nearby_distances = []
+    for i in candidates:
+        distance = haversine(lat, lng, sites.lat[i], sites.lng[i])
+        if distance <= FOOT_TRAFFIC_RADIUS:
+            nearby_idx.append(i)
+            nearby_distances.append(distance)
+    
+    nearby_counts = [
+        {
+            'location': sites.location[i],
+            'distance': round(distance, 2),
+            'avg_count': int(sites.rounded_count[i]),
+            'borough': sites.borough[i]
+        }
+        for i, distance in zip(nearby_idx, nearby_distances)
+    ]
     
     # Calculate score based on pedestrian traffic
     if not nearby_counts:
@@ -203,8 +314,8 @@ def calculate_foot_traffic(lat, lng):
             'count': 0
         }
     
-    # Get average pedestrian count from all nearby locations
-    total_avg = sum(loc['avg_count'] for loc in nearby_counts) / len(nearby_counts)
+    # Get average pedestrian count from all nearby locations (masked mean)
+    total_avg = float(sites.rounded_count[nearby_idx].mean())
     
     # Normalize to 0-100 score
     # Based on pedestrian count ranges:
@@ -248,22 +359,31 @@ def haversine(lat1, lon1, lat2, lon2):
     return miles
 
 # Transit Access Calculation
-def calculate_transit_access(lat, lng, subway_data=subway_data,):
+def calculate_transit_access(lat, lng, stations=None):
     """
     Count subway stations within 0.5 mile
     Returns score 0-100 based on proximity to subway stations
     """
-    nearby_stations = []
-    for station in subway_data:
-        station_lat = float(station['gtfs_latitude'])
-        station_lng = float(station['gtfs_longitude'])
-        distance = haversine(lat, lng, station_lat, station_lng)
-        if distance <= 0.5:  # miles
-            nearby_stations.append({
-                'name': station['stop_name'],
-                'distance': round(distance, 2),
-                'routes': station.get('daytime_routes', '')
-            })
+    if stations is None:
+        stations = datasets.stations
+    matches = stations.within(lat, lng, TRANSIT_RADIUS)
+    # Closest station distance, only searching further out when none are within 0.5 mi
+    if matches:
+        nearest_distance = min(distance for distance, _ in matches)
+    else:
+        nearest_distance = stations.nearest_distance(lat, lng)
+    return transit_access_from_matches(matches, nearest_distance, stations)
+
+def transit_access_from_matches(matches, nearest_distance, stations):
+    """Build the transit result from (distance, station index) matches in dataset order"""
+    nearby_stations = [
+        {
+            'name': stations.name[i],
+            'distance': round(distance, 2),
+            'routes': stations.routes[i]
+        }
+        for distance, i in matches
+    ]
     
     # Score based on count and add breakdown
     station_count = len(nearby_stations)
@@ -279,21 +399,103 @@ def calculate_transit_access(lat, lng, subway_data=subway_data,):
     return {
         'score': score,
         'nearby_stations': nearby_stations,
-        'count': station_count
+        'count': station_count,
+        'nearest_station_distance': round(nearest_distance, 2) if nearest_distance is not None else None
     }
 
-def calculate_location_score(neighborhood, business_type, target_demo, latitude, longitude):
+def score_memo_key(latitude, longitude, snapshot):
+    """Memo key for the coordinates (None when memoization is disabled)"""
+    global score_memo_version
+    if SCORE_MEMO_PRECISION <= 0:
+        return None
+    if score_memo_version != snapshot.version:
+        score_memo.clear()
+        score_memo_version = snapshot.version
+    return (snapshot.version, geohash_encode(latitude, longitude, SCORE_MEMO_PRECISION))
+
+def recall_location_score(key):
+    """Memoized result for key (None on a miss); logs memo stats every SCORE_MEMO_LOG_EVERY lookups"""
+    global score_memo_lookups
+    if key is None:
+        return None
+    score_memo_lookups += 1
+    if SCORE_MEMO_LOG_EVERY > 0 and score_memo_lookups % SCORE_MEMO_LOG_EVERY == 0:
+        print(f"📊 Location score memo: {score_memo.stats()}")
+    return score_memo.get(key)
+
+def remember_location_score(key, result):
+    if key is not None:
+        score_memo.set(key, result)
+
+def compute_location_score(neighborhood, business_type, target_demo, latitude, longitude, snapshot=None):
     """
     Returns score 0-100 with confidence level
     Calculates overall location score based on multiple factors
     """
+    if snapshot is None:
+        snapshot = datasets
     
     # Component scores (each 0-100)
-    foot_traffic_result = calculate_foot_traffic(latitude, longitude)  # 40% weight
-    transit_result = calculate_transit_access(latitude, longitude)     # 60% weight
+    foot_traffic_result = calculate_foot_traffic(latitude, longitude, snapshot.sites)  # 40% weight
+    transit_result = calculate_transit_access(latitude, longitude, snapshot.stations)  # 60% weight
     # demo_match = calculate_demo_match(neighborhood, target_demo)      # Future
     # TODO: implement this 
     
+    return combine_scores(foot_traffic_result, transit_result)
+
+def score_location(neighborhood, business_type, target_demo, latitude, longitude, details=True):
+    """
+    Returns score 0-100 with confidence level
+    With details=False (score-only requests) the precomputed raster answers
+    when enabled and the point's cell is clear of radius boundaries; its
+    results carry no nearby site / station lists. Otherwise the exact result
+    is memoized by geohash of (latitude, longitude) since the score does not
+    depend on business_type / target_demo yet; the memo is dropped whenever
+    the pedestrian or subway dataset version changes. Results are shared
+    between callers and must not be mutated.
+    """
+    snapshot = datasets
+    result = None if details else raster_location_score(latitude, longitude, snapshot)
+    if result is not None:
+        return result
+    key = score_memo_key(latitude, longitude, snapshot)
+    result = recall_location_score(key)
+    if result is None:
+        result = compute_location_score(neighborhood, business_type, target_demo, latitude, longitude, snapshot)
+        remember_location_score(key, result)
+    return result
+
+def raster_location_score(latitude, longitude, snapshot):
+    """
+    Score-only result from the snapshot's raster, or None when it cannot answer
+    Same keys as the exact result, but the nearby_locations / nearby_stations
+    lists are left empty (the raster does not store them), so it only serves
+    score-only requests.
+    """
+    values = snapshot.raster.lookup(latitude, longitude) if snapshot.raster is not None else None
+    if values is None:
+        return None
+    nearest_distance = snapshot.stations.nearest_distance(latitude, longitude)
+    
+    result = combine_scores(
+        {
+            'score': values['ft_score'],
+            'nearby_locations': [],
+            'average_pedestrians': values['ft_avg'],
+            'count': values['ft_count']
+        },
+        {
+            'score': values['tr_score'],
+            'nearby_stations': [],
+            'count': values['tr_count'],
+            'nearest_station_distance': round(nearest_distance, 2) if nearest_distance is not None else None
+        }
+    )
+    result['breakdown']['source'] = 'raster'
+    return result
+
+def combine_scores(foot_traffic_result, transit_result):
+    """Weighted total and confidence from the component results"""
     # Calculate weighted total with current factors
     total = (
         foot_traffic_result['score'] * 0.40 +
@@ -324,6 +526,188 @@ def calculate_location_score(neighborhood, business_type, target_demo, latitude,
         }
     }
 
+# (component, detail list, summary key for the omitted rest, per-entry value averaged in the summary)
+BREAKDOWN_LISTS = (
+    ('foot_traffic', 'nearby_locations', 'other_locations', 'avg_count'),
+    ('transit_access', 'nearby_stations', 'other_stations', None),
+)
+
+def nearest_first(items, k=None):
+    """
+    (nearest entries sorted by distance, remaining entries)
+    With k, only the k nearest are selected (partial sort) and the rest returned unsorted
+    """
+    if k is None or len(items) <= k:
+        return sorted(items, key=lambda item: item['distance']), []
+    nearest = set(heapq.nsmallest(max(k, 0), range(len(items)), key=lambda i: items[i]['distance']))
+    top = sorted((items[i] for i in nearest), key=lambda item: item['distance'])
+    return top, [item for i, item in enumerate(items) if i not in nearest]
+
+def summarize_omitted(items, value_key=None):
+    """Aggregate stats for breakdown entries left out of the response"""
+    summary = {'count': len(items)}
+    if items:
+        distances = [item['distance'] for item in items]
+        summary.update({
+            'min_distance': min(distances),
+            'max_distance': max(distances),
+            'mean_distance': round(sum(distances) / len(distances), 2),
+        })
+        if value_key:
+            summary['average_pedestrians'] = round(sum(item[value_key] for item in items) / len(items))
+    return summary
+
+def bounded_result(result, full=False, k=None):
+    """
+    Copy of a score result with nearest-first breakdown lists
+    Unless full, each list keeps only the k nearest entries (BREAKDOWN_TOP_K by
+    default) and the rest are summarized, so payload size stays bounded.
+    The input (possibly a shared memo entry) is not modified.
+    """
+    k = BREAKDOWN_TOP_K if k is None else k
+    breakdown = dict(result['breakdown'])
+    for component, list_key, summary_key, value_key in BREAKDOWN_LISTS:
+        if component not in breakdown:
+            continue
+        detail = dict(breakdown[component])
+        nearest, rest = nearest_first(detail.get(list_key, []), None if full else k)
+        detail[list_key] = nearest
+        if not full:
+            detail[summary_key] = summarize_omitted(rest, value_key)
+        breakdown[component] = detail
+    return dict(result, breakdown=breakdown)
+
+def _distance_blocks(lats, lngs, target_lat, target_lng):
+    """
+    Yield (start, distances) for row blocks of the points x targets distance matrix
+    Block height is chosen so each block holds at most BATCH_BLOCK_ELEMENTS distances
+    """
+    rows = max(1, BATCH_BLOCK_ELEMENTS // max(len(target_lat), 1))
+    for start in range(0, len(lats), rows):
+        end = start + rows
+        yield start, haversine_np(
+            lats[start:end, None], lngs[start:end, None],
+            target_lat[None, :], target_lng[None, :]
+        )
+
+def calculate_location_score_batch(points, snapshot=None):
+    """
+    Score many (latitude, longitude) points at once
+    Distances to pedestrian sites and subway stations are computed as vectorized
+    matrices in bounded blocks; each point gets the same result dict as
+    compute_location_score
+    """
+    if len(points) == 0:
+        return []
+    coords = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    lats, lngs = coords[:, 0], coords[:, 1]
+    if snapshot is None:
+        snapshot = datasets
+    sites, stations = snapshot.sites, snapshot.stations
+    
+    foot_traffic_results = [None] * len(coords)
+    for start, distances in _distance_blocks(lats, lngs, sites.lat, sites.lng):
+        hits = sites.has_counts & (distances <= FOOT_TRAFFIC_RADIUS + DISTANCE_EPSILON)
+        for row in range(distances.shape[0]):
+            i = start + row
+            foot_traffic_results[i] = foot_traffic_from_candidates(
+                float(lats[i]), float(lngs[i]), np.flatnonzero(hits[row]), sites
+            )
+    
+    transit_results = [None] * len(coords)
+    if len(stations) == 0:
+        for i in range(len(coords)):
+            transit_results[i] = transit_access_from_matches([], None, stations)
+    else:
+        for start, distances in _distance_blocks(lats, lngs, stations.lat, stations.lng):
+            hits = distances <= TRANSIT_RADIUS + DISTANCE_EPSILON
+            closest = distances.argmin(axis=1)
+            for row in range(distances.shape[0]):
+                i = start + row
+                lat, lng = float(lats[i]), float(lngs[i])
+                # Exact scalar distances, as in the indexed single-point path
+                matches = []
+                for j in np.flatnonzero(hits[row]):
+                    distance = haversine(lat, lng, stations.lat[j], stations.lng[j])
+                    if distance <= TRANSIT_RADIUS:
+                        matches.append((distance, int(j)))
+                if matches:
+                    nearest_distance = min(distance for distance, _ in matches)
+                else:
+                    j = closest[row]
+                    nearest_distance = haversine(lat, lng, stations.lat[j], stations.lng[j])
+                transit_results[i] = transit_access_from_matches(matches, nearest_distance, stations)
+    
+    return [combine_scores(ft, tr) for ft, tr in zip(foot_traffic_results, transit_results)]
+
+
+def calculate_component_scores(lats, lngs, edge_meters=0.0):
+    """
+    Vectorized component scores and counts for flat coordinate arrays
+    Used to build the score raster (see score_raster.LAYERS); edge flags points
+    with a site or station within edge_meters of a search radius boundary
+    """
+    snapshot = datasets
+    sites, stations = snapshot.sites, snapshot.stations
+    n = len(lats)
+    ft_count = np.zeros(n, dtype=np.int64)
+    ft_sum = np.zeros(n, dtype=np.float64)
+    tr_count = np.zeros(n, dtype=np.int64)
+    edge = np.zeros(n, dtype=bool)
+    counts = sites.rounded_count.astype(np.float64)
+    edge_miles = edge_meters / METERS_PER_MILE
+    
+    for start, distances in _distance_blocks(lats, lngs, sites.lat, sites.lng):
+        hits = sites.has_counts & (distances <= FOOT_TRAFFIC_RADIUS)
+        end = start + hits.shape[0]
+        ft_count[start:end] = hits.sum(axis=1)
+        ft_sum[start:end] = hits.astype(np.float64) @ counts
+        edge[start:end] |= (sites.has_counts & (np.abs(distances - FOOT_TRAFFIC_RADIUS) <= edge_miles)).any(axis=1)
+    for start, distances in _distance_blocks(lats, lngs, stations.lat, stations.lng):
+        end = start + distances.shape[0]
+        tr_count[start:end] = (distances <= TRANSIT_RADIUS).sum(axis=1)
+        edge[start:end] |= (np.abs(distances - TRANSIT_RADIUS) <= edge_miles).any(axis=1)
+    
+    # Same piecewise normalization as calculate_foot_traffic
+    avg = np.divide(ft_sum, ft_count, out=np.zeros(n), where=ft_count > 0)
+    ft_score = np.select(
+        [avg <= 1000, avg <= 3000, avg <= 5000],
+        [(avg / 1000) * 40, 40 + ((avg - 1000) / 2000) * 30, 70 + ((avg - 3000) / 2000) * 20],
+        90 + np.minimum((avg - 5000) / 5000 * 10, 10)
+    )
+    ft_score = np.where(ft_count > 0, np.round(np.minimum(ft_score, 100)), 0)
+    tr_score = np.select([tr_count >= 3, tr_count == 2, tr_count == 1], [100, 80, 60], 30)
+    
+    return {
+        'ft_score': ft_score,
+        'ft_count': ft_count,
+        'ft_avg': np.round(avg),
+        'tr_score': tr_score,
+        'tr_count': tr_count,
+        'edge': edge,
+    }
+
+
+def sync_datasets(version):
+    """Pool prepare hook: reload a worker's datasets once the agent has moved past them"""
+    if datasets.version != version:
+        try:
+            reload_datasets()
+        except Exception as e:
+            print(f"⚠️  Scoring worker could not reload datasets: {e}")
+
+# Large batches run in forked workers that inherit the datasets loaded at startup
+scoring_pool = ScoringPool(
+    {'batch': calculate_location_score_batch},
+    workers=SCORING_WORKERS,
+    prepare=sync_datasets,
+)
+
 
 if __name__ == "__main__":
-    location_scout.run()
+    if "--build-raster" in sys.argv:
+        # Offline stage: precompute component scores for the whole city
+        print(f"Building score raster for dataset version {datasets.version}...")
+        print(f"✅ Score raster written to {build_raster(calculate_component_scores, datasets.version)}")
+    else:
+        location_scout.run()
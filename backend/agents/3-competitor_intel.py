@@ -1,9 +1,15 @@
 # competitor_intel.py
 from uagents import Agent, Context, Model
-import requests
 import os
-import json
-import hashlib
+import sys
+from pathlib import Path
+import places_api_service
+from places_api_service import get_nearby_competitors, close_session, places_cache
+
+# Add parent directory to path to import the record/replay and resilience layers
+sys.path.append(str(Path(__file__).parent.parent))
+from api_replay import replaying
+from resilience import Deadline
 
 class ScoreRequest(Model):
     neighborhood: str
@@ -12,6 +18,8 @@ class ScoreRequest(Model):
     latitude: float
     longitude: float
     rent_estimate: float
+    full_breakdown: bool = False  # Every nearby site/station instead of the k nearest
+    score_only: bool = False  # Breakdown lists not needed (may be answered from the score raster)
 
 class ScoreResponse(Model):
     score: int
@@ -49,52 +57,11 @@ AGENT_METADATA = {
 }
 
 GOOGLE_PLACES_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
-if not GOOGLE_PLACES_API_KEY:
+if not GOOGLE_PLACES_API_KEY and not replaying():
     raise ValueError("GOOGLE_PLACES_API_KEY environment variable is required")
 
-def get_nearby_competitors(lat, lng, business_type, radius):
-    """Fetch competitors from Google Places API with Caching"""
-    
-    # Create cache directory if it doesn't exist
-    if not os.path.exists(".cache"):
-        os.makedirs(".cache")
-        
-    # Generate a unique filename based on query params
-    cache_key = f"{lat}_{lng}_{business_type}_{radius}"
-    cache_hash = hashlib.md5(cache_key.encode()).hexdigest()
-    cache_path = f".cache/{cache_hash}.json"
-    
-    # Check cache first
-    if os.path.exists(cache_path):
-        print(f"💰 Loading from cache: {cache_path}")
-        with open(cache_path, "r") as f:
-            return json.load(f)
-            
-    print("🌍 Fetching from Google Places API...")
-    url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-    params = {
-        "location": f"{lat},{lng}",
-        "radius": radius,
-        "type": business_type,
-        "key": GOOGLE_PLACES_API_KEY
-    }
-    
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        results = response.json().get("results", [])
-        
-        competitors = []
-        for place in results[:10]:
-            competitors.append({
-                "name": place["name"],
-                "rating": place.get("rating", 0),
-                "reviews": place.get("user_ratings_total", 0),
-                "price_level": place.get("price_level", 0),
-                "address": place.get("vicinity", "")
-            })
-        return competitors
-    except:
-        return []  # Fallback to empty on error
+# Seconds an analysis may wait on Places before answering with no competitors
+REQUEST_DEADLINE = float(os.getenv("COMPETITOR_INTEL_DEADLINE", "8"))
 
 def calculate_saturation(competitor_count):
     """More competitors = less score"""
@@ -170,9 +137,15 @@ def calculate_confidence(competitors, radius):
 @competitor_intel.on_message(model=ScoreRequest)
 async def analyze_competitors(ctx: Context, sender: str, msg: ScoreRequest):
     ctx.logger.info(f"Analyzing competitors for {msg.business_type} at ({msg.latitude}, {msg.longitude})")
+    deadline = Deadline(REQUEST_DEADLINE)
 
     search_radius = 1000
-    competitors = get_nearby_competitors(msg.latitude, msg.longitude, msg.business_type, search_radius)
+    competitors = await get_nearby_competitors(
+        msg.latitude, msg.longitude, msg.business_type, search_radius, deadline=deadline
+    )
+    ctx.logger.info(f"Places cache: {places_cache.stats()}, "
+                    f"searches: {places_api_service.places_flight.stats()}, "
+                    f"resilience: {places_api_service.places_resilience.stats()}")
     saturation = calculate_saturation(len(competitors))
     
     # Simple gap analysis
@@ -205,6 +178,11 @@ async def analyze_competitors(ctx: Context, sender: str, msg: ScoreRequest):
     await ctx.send(sender, response)
 
 
+@competitor_intel.on_event("shutdown")
+async def shutdown_handler(ctx: Context):
+    await close_session()
+
+
 if __name__ == "__main__":
     competitor_intel.run()
 
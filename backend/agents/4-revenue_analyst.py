@@ -6,12 +6,18 @@ import os
 
 # Import Visa API service
 try:
-    from visa_api_service import get_nearby_merchants, get_merchant_spending_insights
+    from visa_api_service import (
+        get_nearby_merchants, get_merchant_spending_insights, visa_resilience, visa_cache, visa_memory_cache, close_session
+    )
+    from resilience import Deadline  # On the path once visa_api_service is imported
     VISA_API_AVAILABLE = True
 except ImportError:
     VISA_API_AVAILABLE = False
     print("⚠️  Visa API service not available. Using benchmark data only.")
 
+# Seconds a revenue projection may spend on upstream calls before falling back to benchmarks
+REQUEST_DEADLINE = float(os.getenv("REVENUE_ANALYST_DEADLINE", "10"))
+
 class RevenueRequest(Model):
     business_type: str
     neighborhood: str
@@ -150,6 +156,7 @@ def calculate_revenue(
 @revenue_analyst.on_message(model=RevenueRequest)
 async def project_revenue(ctx: Context, sender: str, msg: RevenueRequest):
     ctx.logger.info(f"Projecting revenue for {msg.business_type} in {msg.neighborhood}")
+    deadline = Deadline(REQUEST_DEADLINE) if VISA_API_AVAILABLE else None
     
     # Try to get Visa merchant data if location is available
     visa_merchant_data = None
@@ -158,11 +165,12 @@ async def project_revenue(ctx: Context, sender: str, msg: RevenueRequest):
     if VISA_API_AVAILABLE and msg.latitude is not None and msg.longitude is not None:
         ctx.logger.info(f"Calling Visa API for merchant data at ({msg.latitude}, {msg.longitude})")
         try:
-            visa_merchant_data = get_nearby_merchants(
+            visa_merchant_data = await get_nearby_merchants(
                 lat=msg.latitude,
                 lng=msg.longitude,
                 business_type=msg.business_type,
-                radius=1000  # 1km radius
+                radius=1000,  # 1km radius
+                deadline=deadline
             )
             if visa_merchant_data:
                 ctx.logger.info(f"Received Visa merchant data: {visa_merchant_data.get('merchant_count', 0)} merchants found")
@@ -171,6 +179,8 @@ async def project_revenue(ctx: Context, sender: str, msg: RevenueRequest):
                 ctx.logger.info("Visa API returned no data, using benchmarks")
         except Exception as e:
             ctx.logger.warning(f"Visa API call failed: {e}. Falling back to benchmarks.")
+        ctx.logger.info(f"Visa cache: memory {visa_memory_cache.stats()}, disk {visa_cache.stats()}, "
+                        f"resilience: {visa_resilience.stats()}")
     
     # Calculate revenue with or without Visa data
     conservative, moderate, optimistic, breakeven = calculate_revenue(
@@ -216,5 +226,12 @@ async def project_revenue(ctx: Context, sender: str, msg: RevenueRequest):
     
     await ctx.send(sender, response)
 
+
+@revenue_analyst.on_event("shutdown")
+async def shutdown_handler(ctx: Context):
+    if VISA_API_AVAILABLE:
+        await close_session()
+
+
 if __name__ == "__main__":
     revenue_analyst.run()
@@ -0,0 +1,175 @@
+# dataset_cache.py
+"""
+Compact binary cache of location_scout's pre-processed datasets
+The pedestrian GeoJSON and subway JSON are parsed once into typed .npy arrays
+plus a string table (one UTF-8 blob and an offsets array per column), stored
+in a directory named after the SHA-256 of the source files. Agents memory-map
+the arrays at startup instead of re-parsing JSON, so several processes on one
+host share the same page-cache pages, and a changed source file simply hashes
+to a new directory that is built on first use.
+"""
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from scout_datasets import PedestrianSites, SubwayStations
+
+CACHE_DIR = Path(os.getenv("LOCATION_SCOUT_DATASET_CACHE_DIR", Path(__file__).parent / "data" / ".dataset_cache"))
+
+# Bump when the on-disk layout or the parsing in scout_datasets changes
+CACHE_FORMAT = 2
+
+ARRAYS = {
+    "site_lat": lambda sites, stations: sites.lat,
+    "site_lng": lambda sites, stations: sites.lng,
+    "site_avg_count": lambda sites, stations: sites.avg_count,
+    "station_lat": lambda sites, stations: stations.lat,
+    "station_lng": lambda sites, stations: stations.lng,
+}
+STRINGS = {
+    "site_location": lambda sites, stations: sites.location,
+    "site_borough": lambda sites, stations: sites.borough,
+    "station_name": lambda sites, stations: stations.name,
+    "station_routes": lambda sites, stations: stations.routes,
+}
+
+
+class StringTable(Sequence):
+    """Read-only list of strings backed by a UTF-8 blob and an offsets array"""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return self._data[self._offsets[i]:self._offsets[i + 1]].tobytes().decode("utf-8")
+
+
+def source_hash(paths: Iterable[Path]) -> str:
+    """Hash of the cache format and the bytes of every source file"""
+    digest = hashlib.sha256(f"format={CACHE_FORMAT}".encode())
+    for path in paths:
+        digest.update(b"\x00")
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _write_strings(out_dir: Path, name: str, strings: Iterable[str]):
+    encoded = [str(s).encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    np.save(out_dir / f"{name}.offsets.npy", offsets)
+    np.save(out_dir / f"{name}.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+def build_cache(
+    pedestrian_path: Path,
+    subway_path: Path,
+    cache_dir: Path = CACHE_DIR,
+    key: Optional[str] = None,
+) -> Path:
+    """Parse the source files and write the binary cache for their hash"""
+    key = key or source_hash([pedestrian_path, subway_path])
+    with open(pedestrian_path) as f:
+        sites = PedestrianSites.from_geojson(json.load(f))
+    with open(subway_path) as f:
+        stations = SubwayStations.from_records(json.load(f))
+
+    out_dir = cache_dir / key
+    tmp_dir = cache_dir / f".{key}.{os.getpid()}.building"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    for name, column in ARRAYS.items():
+        np.save(tmp_dir / f"{name}.npy", np.ascontiguousarray(column(sites, stations), dtype=np.float64))
+    for name, column in STRINGS.items():
+        _write_strings(tmp_dir, name, column(sites, stations))
+    with open(tmp_dir / "meta.json", "w") as f:
+        json.dump({
+            "format": CACHE_FORMAT,
+            "sources": [str(pedestrian_path), str(subway_path)],
+            "sites": len(sites),
+            "stations": len(stations),
+            "count_fields": list(sites.count_fields),
+        }, f, indent=2)
+
+    try:
+        tmp_dir.rename(out_dir)
+    except OSError:
+        # Another process finished the same build first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # Drop caches built from older versions of the sources
+    for entry in cache_dir.iterdir():
+        if entry.name != key and not entry.name.startswith("."):
+            shutil.rmtree(entry, ignore_errors=True)
+    return out_dir
+
+
+def load_cache(cache_path: Path) -> Optional[Tuple[PedestrianSites, SubwayStations]]:
+    """Memory-map a built cache directory (None if missing or unreadable)"""
+    try:
+        with open(cache_path / "meta.json") as f:
+            meta = json.load(f)
+        if meta.get("format") != CACHE_FORMAT:
+            return None
+        arrays = {name: np.load(cache_path / f"{name}.npy", mmap_mode="r") for name in ARRAYS}
+        strings = {
+            name: StringTable(
+                np.load(cache_path / f"{name}.npy", mmap_mode="r"),
+                np.load(cache_path / f"{name}.offsets.npy", mmap_mode="r"),
+            )
+            for name in STRINGS
+        }
+    except (OSError, ValueError):
+        return None
+
+    sites = PedestrianSites(
+        arrays["site_lat"], arrays["site_lng"], arrays["site_avg_count"],
+        strings["site_location"], strings["site_borough"], meta.get("count_fields", ()),
+    )
+    stations = SubwayStations(
+        arrays["station_lat"], arrays["station_lng"],
+        strings["station_name"], strings["station_routes"],
+    )
+    return sites, stations
+
+
+def load_datasets(
+    pedestrian_path: Path,
+    subway_path: Path,
+    cache_dir: Path = CACHE_DIR,
+) -> Tuple[PedestrianSites, SubwayStations]:
+    """
+    Pre-processed datasets for the source files, building the cache if the
+    sources changed since it was last written
+
+    Args:
+        pedestrian_path: Bi-annual pedestrian counts GeoJSON
+        subway_path: Subway stations JSON
+        cache_dir: Root directory for cache builds
+    """
+    key = source_hash([pedestrian_path, subway_path])
+    datasets = load_cache(cache_dir / key)
+    if datasets is None:
+        print(f"Building dataset cache {key}...")
+        datasets = load_cache(build_cache(pedestrian_path, subway_path, cache_dir, key))
+    if datasets is None:
+        raise OSError(f"Could not load dataset cache {cache_dir / key}")
+    return datasets
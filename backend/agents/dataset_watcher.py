@@ -0,0 +1,69 @@
+# dataset_watcher.py
+"""
+Background reload of agent datasets
+A daemon thread polls a cheap fingerprint of the data sources (file mtimes,
+S3 ETags, ...) and calls a reload function when it changes. The reload runs
+entirely in the watcher thread, so request handlers keep serving the current
+datasets until the caller swaps in the rebuilt ones.
+"""
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+
+class DatasetWatcher:
+    """Polls fingerprint() every interval seconds and calls reload() on change"""
+
+    def __init__(
+        self,
+        fingerprint: Callable[[], Optional[Hashable]],
+        reload: Callable[[], Any],
+        interval: float = 60,
+        name: str = "dataset-watcher",
+    ):
+        self.interval = interval
+        self.name = name
+        self._fingerprint = fingerprint
+        self._reload = reload
+        self._last: Optional[Hashable] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _current(self) -> Optional[Hashable]:
+        try:
+            return self._fingerprint()
+        except Exception as e:
+            print(f"⚠️  {self.name}: could not check sources: {e}")
+            return None
+
+    def start(self):
+        """Start polling (no-op when interval <= 0 or already running)"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._last = self._current()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def check(self) -> bool:
+        """Reload if the sources changed since the last successful reload"""
+        current = self._current()
+        if current is None or current == self._last:
+            return False
+        try:
+            self._reload()
+        except Exception as e:
+            # Keep the old fingerprint so a half-written source is retried next poll
+            print(f"⚠️  {self.name}: reload failed, keeping current datasets: {e}")
+            return False
+        self._last = current
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,76 @@
+# http_stub_server.py
+"""
+Local stub origin for testing backend/http_cache.py
+
+Serves a body for any path with an ETag and Last-Modified, answers matching
+If-None-Match / If-Modified-Since revalidations with 304, and can fail the
+first requests for each path with 503 so the session's retries are
+exercised. PUT replaces a path's body (a source publishing new data), and
+GET /_stats reports how each path was answered:
+
+    python http_stub_server.py --port 8095 --fail-first 2
+    curl http://localhost:8095/population.json
+"""
+import argparse
+import hashlib
+from collections import Counter
+from email.utils import formatdate
+from typing import Dict
+
+from aiohttp import web
+
+STATS_PATH = "/_stats"
+
+
+def create_app(fail_first: int = 0) -> web.Application:
+    """
+    Args:
+        fail_first: Requests per path answered with 503 before serving it
+    """
+    bodies: Dict[str, bytes] = {}
+    modified: Dict[str, str] = {}
+    stats: Counter = Counter()
+
+    def body_for(path: str) -> bytes:
+        if path not in bodies:
+            bodies[path] = f'{{"path": "{path}", "version": 1}}'.encode()
+            modified[path] = formatdate(usegmt=True)
+        return bodies[path]
+
+    async def get(request: web.Request) -> web.Response:
+        path = request.path
+        if path == STATS_PATH:
+            return web.json_response(dict(stats))
+        stats[f"{path} requests"] += 1
+        if stats[f"{path} requests"] <= fail_first:
+            stats[f"{path} 503"] += 1
+            return web.Response(status=503)
+        body = body_for(path)
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        headers = {"ETag": etag, "Last-Modified": modified[path]}
+        if request.headers.get("If-None-Match") == etag or (
+            "If-None-Match" not in request.headers and request.headers.get("If-Modified-Since") == modified[path]
+        ):
+            stats[f"{path} 304"] += 1
+            return web.Response(status=304, headers=headers)
+        stats[f"{path} 200"] += 1
+        return web.Response(body=body, headers=headers, content_type="application/json")
+
+    async def put(request: web.Request) -> web.Response:
+        bodies[request.path] = await request.read()
+        modified[request.path] = formatdate(usegmt=True)
+        return web.Response(status=204)
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", get)
+    app.router.add_put("/{path:.*}", put)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub HTTP origin for http_cache")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8095)
+    parser.add_argument("--fail-first", type=int, default=0, help="503 responses per path before serving it")
+    args = parser.parse_args()
+    web.run_app(create_app(args.fail_first), host=args.host, port=args.port)
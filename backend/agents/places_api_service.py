@@ -0,0 +1,200 @@
+# places_api_service.py
+"""
+Google Places Nearby Search client for competitor_intel
+Async (aiohttp) so a slow Places response never blocks the agent's event
+loop. One ClientSession keeps a pool of keep-alive connections, a semaphore
+bounds how many searches hit the API at once, and every search runs under a
+deadline that covers both waiting for a slot and the request itself.
+
+Successful searches are written through to a disk cache keyed by the
+geohash of the location, the radius and the place type, so nearby queries
+share entries and repeat analyses cost no API calls. Identical searches
+already in flight are coalesced into one upstream request.
+
+Upstream calls go through a circuit breaker (see resilience.py): the deadline
+passed in by the caller bounds each call, and after repeated failures or
+timeouts searches fail fast to an empty competitor list until the API
+recovers. GOOGLE_PLACES_HEDGE=1 sends a second request when the first is
+slower than the observed p95.
+
+Point GOOGLE_PLACES_API_URL at places_stub_server.py to test without a key.
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import aiohttp
+
+# Add parent directory to path to import the shared record/replay layer
+sys.path.append(str(Path(__file__).parent.parent))
+from api_replay import recorded_async
+from resilience import CircuitOpenError, Deadline, DeadlineExceeded, Resilience
+from geohash_utils import geohash_encode
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+
+GOOGLE_PLACES_API_URL = os.getenv(
+    "GOOGLE_PLACES_API_URL", "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+)
+GOOGLE_PLACES_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY", "")
+
+# Seconds a search may take, including time spent waiting for a slot (also caps callers' deadlines)
+PLACES_DEADLINE = float(os.getenv("GOOGLE_PLACES_DEADLINE", "10"))
+# Consecutive failures that open the breaker, seconds before a trial call, and hedging
+PLACES_BREAKER_FAILURES = int(os.getenv("GOOGLE_PLACES_BREAKER_FAILURES", "5"))
+PLACES_BREAKER_RESET = float(os.getenv("GOOGLE_PLACES_BREAKER_RESET", "30"))
+PLACES_HEDGE = os.getenv("GOOGLE_PLACES_HEDGE", "0") == "1"
+# Searches in flight at once, and pooled connections to the API host
+PLACES_MAX_CONCURRENCY = int(os.getenv("GOOGLE_PLACES_MAX_CONCURRENCY", "8"))
+PLACES_POOL_SIZE = int(os.getenv("GOOGLE_PLACES_POOL_SIZE", str(PLACES_MAX_CONCURRENCY)))
+
+# Competitors kept per search
+MAX_COMPETITORS = 10
+
+# Response cache (location, TTL, LRU bound and key precision; 0 TTL disables it)
+PLACES_CACHE_DIR = Path(os.getenv("GOOGLE_PLACES_CACHE_DIR", Path(__file__).parent / ".cache" / "places"))
+PLACES_CACHE_TTL = float(os.getenv("GOOGLE_PLACES_CACHE_TTL", str(7 * 24 * 3600)))
+PLACES_CACHE_MAX_ENTRIES = int(os.getenv("GOOGLE_PLACES_CACHE_MAX_ENTRIES", "5000"))
+PLACES_CACHE_PRECISION = int(os.getenv("GOOGLE_PLACES_CACHE_PRECISION", "8"))  # ~38 m x 19 m cells
+
+# Places API statuses that are real answers (anything else is not cached)
+CACHEABLE_STATUSES = ("OK", "ZERO_RESULTS")
+# Statuses that mean the API is struggling (counted as breaker failures)
+UNAVAILABLE_STATUSES = ("OVER_QUERY_LIMIT", "UNKNOWN_ERROR")
+
+places_cache = ResponseCache(PLACES_CACHE_DIR, PLACES_CACHE_TTL, PLACES_CACHE_MAX_ENTRIES, name="places cache")
+# Upstream searches in flight, keyed like the cache
+places_flight = SingleFlight()
+places_resilience = Resilience(
+    "places",
+    timeout_cap=PLACES_DEADLINE,
+    failure_threshold=PLACES_BREAKER_FAILURES,
+    reset_timeout=PLACES_BREAKER_RESET,
+    hedge=PLACES_HEDGE,
+)
+
+_session: Optional[aiohttp.ClientSession] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Shared session (created on first use inside the running event loop)"""
+    global _session, _semaphore
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=PLACES_POOL_SIZE, ttl_dns_cache=300)
+        _session = aiohttp.ClientSession(connector=connector)
+        _semaphore = asyncio.Semaphore(PLACES_MAX_CONCURRENCY)
+    return _session
+
+
+async def close_session():
+    """Close the shared session (call on agent shutdown)"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def cache_key(lat: float, lng: float, business_type: str, radius: int) -> str:
+    """Cache key shared by all queries in the same geohash cell"""
+    return f"{business_type}|{int(radius)}|{geohash_encode(lat, lng, PLACES_CACHE_PRECISION)}"
+
+
+def parse_places(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Competitor dicts from Places Nearby Search results"""
+    competitors = []
+    for place in results[:MAX_COMPETITORS]:
+        competitors.append({
+            "name": place["name"],
+            "rating": place.get("rating", 0),
+            "reviews": place.get("user_ratings_total", 0),
+            "price_level": place.get("price_level", 0),
+            "address": place.get("vicinity", "")
+        })
+    return competitors
+
+
+class PlacesUnavailable(RuntimeError):
+    """The Places API answered with a server error or an overload status"""
+
+
+async def _fetch(params: Dict[str, Any]) -> Dict[str, Any]:
+    session = _get_session()
+    async with _semaphore:
+        async with session.get(GOOGLE_PLACES_API_URL, params=params) as response:
+            if response.status >= 500:
+                raise PlacesUnavailable(f"HTTP {response.status}")
+            body = await response.json(content_type=None)
+            if body.get("status") in UNAVAILABLE_STATUSES:
+                raise PlacesUnavailable(body["status"])
+            return {"status": response.status, "body": body}
+
+
+async def _search(params: Dict[str, Any], key: Optional[str], deadline: Deadline) -> List[Dict[str, Any]]:
+    # The API key is left out of the recorded request
+    request = {k: v for k, v in params.items() if k != "key"}
+    response = await recorded_async(
+        "places", request, lambda: places_resilience.call_async(lambda: _fetch(params), deadline)
+    )
+    data = response["body"]
+    competitors = parse_places(data.get("results", []))
+    if key is not None and response["status"] == 200 and data.get("status", "OK") in CACHEABLE_STATUSES:
+        await places_cache.set_async(key, competitors)
+    return competitors
+
+
+async def get_nearby_competitors(
+    lat: float,
+    lng: float,
+    business_type: str,
+    radius: int,
+    deadline: Optional[Union[Deadline, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch competitors from Google Places API with Caching
+
+    Args:
+        lat: Latitude of the location
+        lng: Longitude of the location
+        business_type: Places type to search for
+        radius: Search radius in meters
+        deadline: The request's Deadline, or seconds this caller waits for the search
+            (default: PLACES_DEADLINE; the search itself always gets PLACES_DEADLINE)
+
+    Returns:
+        Up to MAX_COMPETITORS competitor dicts (empty on error, timeout or open circuit)
+    """
+    deadline = Deadline.coerce(deadline, PLACES_DEADLINE)
+    query_key = cache_key(lat, lng, business_type, radius)
+    key = query_key if PLACES_CACHE_TTL > 0 else None
+    if key is not None:
+        cached = await places_cache.get_async(key)
+        if cached is not None:
+            print(f"💰 Loaded competitors from cache ({places_cache.stats()['saved_api_calls']} API calls saved)")
+            return cached
+
+    print("🌍 Fetching from Google Places API...")
+    params = {
+        "location": f"{lat},{lng}",
+        "radius": radius,
+        "type": business_type,
+        "key": GOOGLE_PLACES_API_KEY
+    }
+    try:
+        if deadline.expired:
+            raise DeadlineExceeded("No time left for places")
+        # The shared search gets its own deadline, so a caller with a short budget
+        # only stops waiting: the search still finishes and fills the cache for the rest
+        search = places_flight.do(query_key, lambda: _search(params, key, Deadline(PLACES_DEADLINE)))
+        return await asyncio.wait_for(search, deadline.budget(PLACES_DEADLINE))
+    except CircuitOpenError:
+        print("⚠️  Places API circuit is open; skipping search")
+        return []
+    except (asyncio.TimeoutError, DeadlineExceeded):
+        print(f"⚠️  Places search timed out for ({lat}, {lng})")
+        return []
+    except Exception as e:
+        print(f"⚠️  Places search failed: {e}")
+        return []  # Fallback to empty on error
@@ -0,0 +1,79 @@
+# places_stub_server.py
+"""
+Local stub of the Google Places Nearby Search endpoint for testing competitor_intel
+
+Returns deterministic fake places for each (location, radius, type) query,
+optionally after an artificial delay, so the async client can be exercised
+without an API key or quota:
+
+    python places_stub_server.py --port 8090 --latency 0.2
+    GOOGLE_PLACES_API_URL=http://localhost:8090/maps/api/place/nearbysearch/json \
+        GOOGLE_PLACES_API_KEY=stub python 3-competitor_intel.py
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+
+from aiohttp import web
+
+NEARBY_SEARCH_PATH = "/maps/api/place/nearbysearch/json"
+
+STREETS = ["Broadway", "Main St", "5th Ave", "Atlantic Ave", "Grand St", "Court St", "Bedford Ave"]
+
+
+def fake_places(location: str, radius: int, place_type: str):
+    """Same query -> same places; denser results for larger radii"""
+    seed = hashlib.md5(f"{location}|{radius}|{place_type}".encode()).hexdigest()
+    rng = random.Random(seed)
+    lat, lng = (float(v) for v in location.split(","))
+    count = rng.randint(0, max(1, radius // 100))
+    places = []
+    for i in range(count):
+        place = {
+            "name": f"Stub {place_type.replace('_', ' ').title()} {i + 1}",
+            "vicinity": f"{rng.randint(1, 999)} {rng.choice(STREETS)}",
+            "geometry": {"location": {
+                "lat": round(lat + rng.uniform(-1, 1) * radius / 111320, 6),
+                "lng": round(lng + rng.uniform(-1, 1) * radius / 84000, 6),
+            }},
+            "types": [place_type],
+            "business_status": "OPERATIONAL",
+        }
+        if rng.random() < 0.8:
+            place["rating"] = round(rng.uniform(3.0, 5.0), 1)
+            place["user_ratings_total"] = rng.randint(1, 2000)
+        if rng.random() < 0.6:
+            place["price_level"] = rng.randint(1, 4)
+        places.append(place)
+    return places
+
+
+def create_app(latency: float = 0.0, failure_rate: float = 0.0) -> web.Application:
+    async def nearby_search(request: web.Request) -> web.Response:
+        query = request.query
+        if not query.get("key"):
+            return web.json_response({"status": "REQUEST_DENIED", "results": []})
+        if latency:
+            await asyncio.sleep(latency)
+        if failure_rate and random.random() < failure_rate:
+            return web.json_response({"status": "UNKNOWN_ERROR", "results": []}, status=500)
+        try:
+            places = fake_places(query["location"], int(query.get("radius", 1000)), query.get("type", "store"))
+        except (KeyError, ValueError):
+            return web.json_response({"status": "INVALID_REQUEST", "results": []}, status=400)
+        return web.json_response({"status": "OK" if places else "ZERO_RESULTS", "results": places})
+
+    app = web.Application()
+    app.router.add_get(NEARBY_SEARCH_PATH, nearby_search)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Google Places Nearby Search server")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    args = parser.parse_args()
+    web.run_app(create_app(args.latency, args.failure_rate), host=args.host, port=args.port)
@@ -0,0 +1,230 @@
+# prefetch_caches.py
+"""
+Warm the Places and Visa caches before a dataset build
+
+Expands the vacant storefronts x business types into the deduplicated set of
+upstream queries (one per geohash cell / type / radius, matching the Places
+and Visa cache keys), then runs them under a global rate limit and concurrency
+cap. Completed queries are recorded in a progress file, so an interrupted
+run picks up where it stopped. The build afterwards answers from cache.
+Visa queries in the same area tile are sent as one batch (one wide tile
+search filtered locally, see get_nearby_merchants_batch) unless --no-visa-batch.
+
+    python prefetch_caches.py --limit 100 --rate 5 --concurrency 4
+    python prefetch_caches.py --business-types cafe restaurant --sources places
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+import visa_api_service
+from geohash_utils import geohash_encode
+from places_api_service import cache_key, close_session, get_nearby_competitors, places_cache
+from storefronts import STOREFRONTS_FILE, load_vacant_storefronts, storefront_business_type
+
+SEARCH_RADIUS = 1000  # Same radius competitor_intel and revenue_analyst use
+PROGRESS_FILE = Path(__file__).parent / ".cache" / "prefetch_progress.json"
+SAVE_EVERY = 20
+
+
+class RateLimiter:
+    """Token bucket shared by all prefetch workers (rate requests per second)"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def build_queries(storefronts: List[dict], business_types: Optional[List[str]], sources: Iterable[str], radius: int) -> List[Dict]:
+    """Deduplicated upstream queries, in storefront order"""
+    queries = []
+    seen: Set[str] = set()
+    for storefront in storefronts:
+        lat, lng = storefront['latitude'], storefront['longitude']
+        for business_type in business_types or [storefront_business_type(storefront)]:
+            for source in sources:
+                key = query_key(source, lat, lng, business_type, radius)
+                if key not in seen:
+                    seen.add(key)
+                    queries.append({'key': key, 'source': source, 'lat': lat, 'lng': lng,
+                                    'business_type': business_type, 'radius': radius})
+    return queries
+
+
+def query_key(source: str, lat: float, lng: float, business_type: str, radius: int) -> str:
+    if source == 'places':
+        return f"places|{cache_key(lat, lng, business_type, radius)}"
+    return f"visa|{visa_api_service.cache_key(lat, lng, business_type, radius)}"
+
+
+async def run_query(query: Dict) -> bool:
+    """Fetch one query into its cache; True when the result was cached"""
+    lat, lng, business_type, radius = query['lat'], query['lng'], query['business_type'], query['radius']
+    if query['source'] == 'places':
+        await get_nearby_competitors(lat, lng, business_type, radius)
+        return await places_cache.get_async(cache_key(lat, lng, business_type, radius), count=False) is not None
+    return await visa_api_service.get_nearby_merchants(lat, lng, business_type, radius) is not None
+
+
+def batch_visa_queries(queries: List[Dict]) -> List[Dict]:
+    """Places queries unchanged; Visa queries grouped into one 'visa-batch' item per area tile"""
+    items = []
+    batches: Dict[tuple, Dict] = {}
+    for query in queries:
+        if query['source'] != 'visa':
+            items.append(query)
+            continue
+        tile = geohash_encode(query['lat'], query['lng'], visa_api_service.VISA_TILE_PRECISION)
+        group = (query['business_type'], query['radius'], tile)
+        if group not in batches:
+            batches[group] = {'source': 'visa-batch', 'business_type': query['business_type'],
+                              'radius': query['radius'], 'queries': []}
+            items.append(batches[group])
+        batches[group]['queries'].append(query)
+    return items
+
+
+async def run_batch(batch: Dict) -> List[bool]:
+    """Fetch a Visa tile batch into the cache; whether each query's result was cached"""
+    queries = batch['queries']
+    results = await visa_api_service.get_nearby_merchants_batch(
+        [(q['lat'], q['lng']) for q in queries], batch['business_type'], batch['radius']
+    )
+    return [result is not None for result in results]
+
+
+def is_cached(query: Dict) -> bool:
+    """
+    Already answerable from cache without an API call (checked before taking a
+    rate token; not counted in the caches' hit stats)
+    """
+    lat, lng, business_type, radius = query['lat'], query['lng'], query['business_type'], query['radius']
+    if query['source'] == 'visa':
+        key = visa_api_service.cache_key(lat, lng, business_type, radius)
+        return visa_api_service.cached_merchants(key, count=False) is not None
+    return places_cache.get(cache_key(lat, lng, business_type, radius), count=False) is not None
+
+
+def load_progress(path: Path) -> Set[str]:
+    try:
+        with open(path, 'r') as f:
+            return set(json.load(f).get('done', []))
+    except (OSError, ValueError):
+        return set()
+
+
+def save_progress(path: Path, done: Set[str]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'done': sorted(done), 'updated_at': time.time()}, f)
+    os.replace(tmp_path, path)
+
+
+async def prefetch(
+    queries: List[Dict], rate: float, concurrency: int, progress_path: Path, visa_batch: bool = True
+) -> Dict[str, int]:
+    done = load_progress(progress_path)
+    pending = [q for q in queries if q['key'] not in done]
+    print(f"{len(queries)} unique queries, {len(queries) - len(pending)} already done, {len(pending)} to fetch")
+
+    limiter = RateLimiter(rate, burst=concurrency)
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in batch_visa_queries(pending) if visa_batch else pending:
+        queue.put_nowait(item)
+    counts = {'fetched': 0, 'cached': 0, 'failed': 0}
+
+    def finish(query: Dict, ok: bool):
+        if ok:
+            done.add(query['key'])
+            if len(done) % SAVE_EVERY == 0:
+                save_progress(progress_path, done)
+
+    async def worker():
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if item['source'] == 'visa-batch':
+                uncached = []
+                for query in item['queries']:
+                    if is_cached(query):
+                        counts['cached'] += 1
+                        finish(query, True)
+                    else:
+                        uncached.append(query)
+                if uncached:
+                    # One token per tile: a batch is usually one search (more only when it pages)
+                    await limiter.acquire()
+                    results = await run_batch({**item, 'queries': uncached})
+                    for query, ok in zip(uncached, results):
+                        counts['fetched' if ok else 'failed'] += 1
+                        finish(query, ok)
+            elif is_cached(item):
+                counts['cached'] += 1
+                finish(item, True)
+            else:
+                await limiter.acquire()
+                ok = await run_query(item)
+                counts['fetched' if ok else 'failed'] += 1
+                finish(item, ok)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    finally:
+        save_progress(progress_path, done)
+        await close_session()
+        await visa_api_service.close_session()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefetch Places and Visa responses for the dataset build")
+    parser.add_argument('--storefronts', type=Path, default=STOREFRONTS_FILE, help="Storefronts GeoJSON")
+    parser.add_argument('--limit', type=int, default=100, help="Vacant storefronts to load (the build uses 100)")
+    parser.add_argument('--business-types', nargs='*', help="Types to prefetch (default: each storefront's own)")
+    parser.add_argument('--sources', nargs='+', choices=['places', 'visa'], default=['places', 'visa'])
+    parser.add_argument('--radius', type=int, default=SEARCH_RADIUS, help="Search radius in meters")
+    parser.add_argument('--rate', type=float, default=5.0, help="Max upstream requests per second (0 = unlimited)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Max requests in flight")
+    parser.add_argument('--progress', type=Path, default=PROGRESS_FILE, help="Progress file for resuming")
+    parser.add_argument('--restart', action='store_true', help="Ignore recorded progress")
+    parser.add_argument('--no-visa-batch', action='store_true', help="Query Visa per storefront instead of per area tile")
+    args = parser.parse_args()
+
+    if args.restart and args.progress.exists():
+        args.progress.unlink()
+    storefronts = load_vacant_storefronts(limit=args.limit, data_path=args.storefronts)
+    queries = build_queries(storefronts, args.business_types, args.sources, args.radius)
+
+    started = time.monotonic()
+    counts = asyncio.run(prefetch(queries, args.rate, args.concurrency, args.progress, visa_batch=not args.no_visa_batch))
+    print(f"✅ Prefetch finished in {time.monotonic() - started:.1f}s: {counts}")
+    if not args.no_visa_batch:
+        print(f"🗺️  Visa tile batching: {visa_api_service.tile_stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# response_cache.py
+"""
+Size-bounded, TTL'd JSON response cache on disk
+Each entry is one JSON file named by the SHA-256 of its key and written
+atomically (temp file + rename), so concurrent agents never read a partial
+entry. Reads refresh the file's mtime, which doubles as the LRU clock: when
+the directory holds more than max_entries files the least recently used
+ones are deleted, down to low_water of max_entries so the directory scan
+this takes happens once per batch of writes rather than on every write.
+
+Async callers use get_async / set_async, which do the file I/O in a worker
+thread instead of on the event loop.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """Write-through disk cache of JSON-serializable values keyed by strings"""
+
+    def __init__(
+        self,
+        directory: Path,
+        ttl: float = 7 * 24 * 3600,
+        max_entries: int = 5000,
+        name: str = "cache",
+        low_water: float = 0.9,
+    ):
+        self.directory = Path(directory).expanduser().resolve()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.name = name
+        # Eviction trims the cache to this many entries
+        self.low_water_entries = int(max_entries * low_water)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Counted on the first write (not at import time)
+        self._entry_count: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def get(self, key: str, count: bool = True) -> Optional[Any]:
+        """
+        Cached value for key, or None when missing or older than the TTL
+        (count=False leaves the hit/miss counters and the LRU order untouched)
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        if entry is None or entry.get("key") != key or time.time() - entry.get("stored_at", 0) > self.ttl:
+            if count:
+                with self._lock:
+                    self.misses += 1
+            return None
+        if not count:
+            return entry["value"]
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry["value"]
+
+    async def get_async(self, key: str, count: bool = True) -> Optional[Any]:
+        """get() with the file read off the event loop"""
+        return await asyncio.to_thread(self.get, key, count)
+
+    def set(self, key: str, value: Any):
+        """Store value for key (atomic; evicts least recently used entries past max_entries)"""
+        path = self._path(key)
+        existed = path.exists()
+        data = json.dumps({"key": key, "stored_at": time.time(), "value": value}).encode()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            print(f"Warning: could not write {self.name} entry: {e}")
+            return
+        if self._entry_count is None:
+            count = sum(1 for _ in self.directory.glob("*.json"))
+            with self._lock:
+                if self._entry_count is None:
+                    self._entry_count = count
+                    existed = True  # Already counted by the scan
+        with self._lock:
+            self.writes += 1
+            if not existed:
+                self._entry_count += 1
+            over = self._entry_count > self.max_entries
+        if over:
+            self._evict()
+
+    async def set_async(self, key: str, value: Any):
+        """set() with the file write (and any eviction) off the event loop"""
+        await asyncio.to_thread(self.set, key, value)
+
+    def _evict(self):
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                pass
+        entries.sort()
+        excess = max(0, len(entries) - self.low_water_entries) if len(entries) > self.max_entries else 0
+        removed = 0
+        for _, path in entries[:excess]:
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._entry_count = len(entries) - removed
+            self.evictions += removed
+
+    def clear(self):
+        for path in self.directory.glob("*.json"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        with self._lock:
+            self._entry_count = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": self._entry_count,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "saved_api_calls": self.hits,
+        }
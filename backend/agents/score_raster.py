@@ -0,0 +1,172 @@
+# score_raster.py
+"""
+Precomputed city-wide raster of location_scout component scores
+Foot traffic and transit access depend only on coordinates and the static
+pedestrian / subway datasets, so they can be evaluated once on a fine grid
+over NYC and stored as memory-mapped arrays. A lookup is then a read of the
+four grid nodes around a point. Every point of a cell is within one cell
+diagonal of its nodes, so the nodes' values hold for the whole cell unless
+some site or station lies within a diagonal of a search radius boundary from
+a node; such nodes are flagged in the "edge" layer. Points in flagged cells,
+outside the grid, or looked up in a raster built from other datasets fall
+back to the exact computation.
+
+Build it with: python 2-location_scout.py --build-raster
+"""
+import json
+import os
+import shutil
+import numpy as np
+from math import cos, radians, floor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+RASTER_DIR = Path(os.getenv("LOCATION_SCOUT_RASTER_DIR", Path(__file__).parent / "data" / "score_raster"))
+
+# (min_lat, min_lng, max_lat, max_lng) covering the five boroughs
+NYC_BOUNDS = (40.49, -74.27, 40.92, -73.68)
+CELL_METERS = float(os.getenv("LOCATION_SCOUT_RASTER_CELL_METERS", "50"))
+METERS_PER_DEGREE_LAT = 111320
+
+# Stored layers and their on-disk types
+LAYERS = {
+    "ft_score": np.uint8,     # foot_traffic.score
+    "ft_count": np.uint16,    # foot_traffic.count
+    "ft_avg": np.uint32,      # foot_traffic.average_pedestrians
+    "tr_score": np.uint8,     # transit_access.score
+    "tr_count": np.uint16,    # transit_access.count
+    "edge": np.uint8,         # 1 where a radius boundary passes within a cell diagonal
+}
+
+# Values read from the raster (the edge layer only gates lookups)
+VALUE_LAYERS = tuple(name for name in LAYERS if name != "edge")
+
+# Grid rows evaluated per build step
+BUILD_ROWS_PER_CHUNK = 16
+
+
+def grid_spec(bounds=NYC_BOUNDS, cell_meters=CELL_METERS) -> Dict[str, float]:
+    """Node spacing (degrees) and grid shape for the bounds"""
+    min_lat, min_lng, max_lat, max_lng = bounds
+    dlat = cell_meters / METERS_PER_DEGREE_LAT
+    dlng = cell_meters / (METERS_PER_DEGREE_LAT * cos(radians((min_lat + max_lat) / 2)))
+    return {
+        "min_lat": min_lat,
+        "min_lng": min_lng,
+        "dlat": dlat,
+        "dlng": dlng,
+        "rows": int(np.ceil((max_lat - min_lat) / dlat)) + 1,
+        "cols": int(np.ceil((max_lng - min_lng) / dlng)) + 1,
+        "cell_meters": cell_meters,
+    }
+
+
+def cell_diagonal_meters(spec: Dict[str, float]) -> float:
+    """Longest cell diagonal in the grid (cells are widest at its southern edge), plus a meter of slack"""
+    width = spec["dlng"] * METERS_PER_DEGREE_LAT * cos(radians(spec["min_lat"]))
+    return float(np.hypot(spec["dlat"] * METERS_PER_DEGREE_LAT, width)) + 1
+
+
+def build_raster(
+    compute_scores: Callable[[np.ndarray, np.ndarray, float], Dict[str, np.ndarray]],
+    dataset_version: str,
+    out_dir: Path = RASTER_DIR,
+    bounds=NYC_BOUNDS,
+    cell_meters: float = CELL_METERS,
+) -> Path:
+    """
+    Evaluate compute_scores on every grid node and write the layers to out_dir
+
+    Args:
+        compute_scores: Maps flat arrays of lats/lngs and the cell diagonal
+            (meters) to a dict of LAYERS arrays
+        dataset_version: Version of the datasets the scores were computed from
+        out_dir: Target directory (replaced atomically once the build finishes)
+        bounds: (min_lat, min_lng, max_lat, max_lng)
+        cell_meters: Grid spacing in meters
+    """
+    spec = grid_spec(bounds, cell_meters)
+    rows, cols = spec["rows"], spec["cols"]
+    tmp_dir = out_dir.with_name(out_dir.name + ".building")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    layers = {
+        name: np.lib.format.open_memmap(tmp_dir / f"{name}.npy", mode="w+", dtype=dtype, shape=(rows, cols))
+        for name, dtype in LAYERS.items()
+    }
+    node_lngs = spec["min_lng"] + np.arange(cols) * spec["dlng"]
+    for row in range(0, rows, BUILD_ROWS_PER_CHUNK):
+        end = min(row + BUILD_ROWS_PER_CHUNK, rows)
+        node_lats = spec["min_lat"] + np.arange(row, end) * spec["dlat"]
+        lats = np.repeat(node_lats, cols)
+        lngs = np.tile(node_lngs, end - row)
+        scores = compute_scores(lats, lngs, cell_diagonal_meters(spec))
+        for name, layer in layers.items():
+            layer[row:end] = scores[name].reshape(end - row, cols)
+        print(f"Raster rows {end}/{rows}")
+
+    for layer in layers.values():
+        layer.flush()
+    with open(tmp_dir / "meta.json", "w") as f:
+        json.dump(dict(spec, dataset_version=dataset_version), f, indent=2)
+
+    # Swap the finished raster into place
+    old_dir = out_dir.with_name(out_dir.name + ".old")
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if out_dir.exists():
+        out_dir.rename(old_dir)
+    tmp_dir.rename(out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return out_dir
+
+
+class ScoreRaster:
+    """Memory-mapped score raster with edge-checked lookups"""
+
+    def __init__(self, meta: Dict, layers: Dict[str, np.ndarray]):
+        self.meta = meta
+        self.dataset_version = meta["dataset_version"]
+        self._min_lat, self._min_lng = meta["min_lat"], meta["min_lng"]
+        self._dlat, self._dlng = meta["dlat"], meta["dlng"]
+        self._rows, self._cols = meta["rows"], meta["cols"]
+        self._layers = layers
+
+    @classmethod
+    def load(cls, raster_dir: Path = RASTER_DIR) -> Optional["ScoreRaster"]:
+        """Open a built raster (None if missing or unreadable)"""
+        try:
+            with open(raster_dir / "meta.json") as f:
+                meta = json.load(f)
+            layers = {name: np.load(raster_dir / f"{name}.npy", mmap_mode="r") for name in LAYERS}
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(meta, layers)
+
+    def _cell(self, lat: float, lng: float) -> Optional[Tuple[int, int]]:
+        row = floor((lat - self._min_lat) / self._dlat)
+        col = floor((lng - self._min_lng) / self._dlng)
+        if 0 <= row < self._rows - 1 and 0 <= col < self._cols - 1:
+            return row, col
+        return None
+
+    def lookup(self, lat: float, lng: float) -> Optional[Dict[str, int]]:
+        """
+        Component values for a point, or None when the point is outside the
+        raster or its cell is near a radius boundary (exact computation needed)
+        """
+        cell = self._cell(lat, lng)
+        if cell is None:
+            return None
+        row, col = cell
+        if self._layers["edge"][row:row + 2, col:col + 2].any():
+            return None
+        values = {}
+        for name in VALUE_LAYERS:
+            layer = self._layers[name]
+            corners = layer[row:row + 2, col:col + 2]
+            first = corners[0, 0]
+            if (corners != first).any():
+                return None
+            values[name] = int(first)
+        return values
@@ -0,0 +1,107 @@
+# scoring_pool.py
+"""
+Process pool for CPU-bound agent work
+Handlers await pool.run(...) for large jobs instead of computing on the
+uAgents event loop, so message intake and heartbeats keep flowing during
+bursts. Workers are forked from the agent process: they inherit the loaded
+datasets (the memory-mapped arrays stay shared pages) and the task functions,
+so only the task arguments and results cross the process boundary.
+
+Forking a process that runs other threads can copy their locks in a locked
+state, so start() must be called before any background thread is started
+(e.g. the dataset watcher); all workers are forked then and live for the
+agent's lifetime. Each task carries the caller's dataset version and the
+prepare hook brings a worker's datasets up to date before running it, so
+workers never score stale data and never need to be re-forked.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Task functions and prepare hook inherited by forked workers (set before the pool starts)
+_tasks: Dict[str, Callable[..., Any]] = {}
+_prepare: Optional[Callable[[str], Any]] = None
+
+
+def _run_task(name: str, version: str, submitted_at: float, args: tuple) -> Tuple[Any, float, float]:
+    """Run a named task; returns (result, seconds queued, seconds running)"""
+    started = time.monotonic()
+    if _prepare is not None:
+        _prepare(version)
+    result = _tasks[name](*args)
+    return result, started - submitted_at, time.monotonic() - started
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+class ScoringPool:
+    """Named CPU-bound tasks run in a long-lived forked process pool"""
+
+    def __init__(
+        self,
+        tasks: Dict[str, Callable[..., Any]],
+        workers: Optional[int] = None,
+        prepare: Optional[Callable[[str], Any]] = None,
+        start_method: str = "fork",
+    ):
+        """
+        Args:
+            tasks: Task name -> function, resolved inside the workers
+            workers: Worker processes (default: CPU count, 0 runs tasks inline)
+            prepare: Called in the worker with the task's dataset version
+                before each task (reloads the worker's datasets when they are stale)
+            start_method: multiprocessing start method; workers must inherit
+                the tasks and datasets, so this should normally stay "fork"
+        """
+        self.tasks = dict(tasks)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.prepare = prepare
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Fork every worker now (call before starting other threads; no-op when inline)"""
+        global _prepare
+        with self._lock:
+            if self.workers <= 0 or self._executor is not None:
+                return
+            if threading.active_count() > 1:
+                print(f"⚠️  Forking scoring workers with {threading.active_count() - 1} other threads running")
+            _tasks.clear()
+            _tasks.update(self.tasks)
+            _prepare = self.prepare
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+            )
+            # With fork, the first submit launches all workers at once
+            self._executor.submit(_ready).result()
+
+    async def run(self, version: str, name: str, *args) -> Tuple[Any, float, float]:
+        """
+        Run a task for the given dataset version
+
+        Returns:
+            (result, seconds queued, seconds running)
+        """
+        submitted_at = time.monotonic()
+        if self.workers <= 0:
+            result = self.tasks[name](*args)
+            return result, 0.0, time.monotonic() - submitted_at
+        if self._executor is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _run_task, name, version, submitted_at, args)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
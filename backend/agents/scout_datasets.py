@@ -0,0 +1,178 @@
+# scout_datasets.py
+"""
+Pre-processed datasets for location_scout
+Parses the pedestrian count GeoJSON once into NumPy arrays so foot-traffic
+scoring can use vectorized distance math instead of re-reading string
+properties for every feature on every request, and indexes subway stations
+in a spatial grid so transit queries only touch nearby cells.
+"""
+import hashlib
+import re
+import sys
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Add parent directory to path to import the shared spatial index
+sys.path.append(str(Path(__file__).parent.parent))
+from spatial_index import GridIndex
+
+# Earth radius used by location_scout's haversine (miles)
+EARTH_RADIUS_MILES = 3959
+
+# Fallback count periods (October 2024 and May 2025) and time-of-day slots
+COUNT_PERIODS = ('oct24', 'may25')
+COUNT_SLOTS = ('am', 'pm', 'md')
+DEFAULT_COUNT_FIELDS = tuple(f'{period}_{slot}' for period in COUNT_PERIODS for slot in COUNT_SLOTS)
+
+# Number of most recent count periods averaged per site
+RECENT_PERIODS = 2
+
+# Count columns look like 'oct24_am', 'may_22_p_m' or 'sept_07_md'
+COUNT_FIELD_PATTERN = re.compile(r'^([a-z]+)_?(\d{2})_(am|md|p_?m)$')
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6, 'june': 6,
+    'jul': 7, 'july': 7, 'aug': 8, 'sep': 9, 'sept': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+
+def detect_count_fields(property_names: Iterable[str], periods: int = RECENT_PERIODS) -> Tuple[str, ...]:
+    """
+    Count columns of the newest periods in the pedestrian dataset, oldest
+    period first (e.g. ('oct24_am', 'oct24_pm', 'oct24_md', 'may25_am', ...));
+    DEFAULT_COUNT_FIELDS when no count columns are recognized
+    """
+    found: Dict[Tuple[int, int], Dict[str, str]] = {}
+    for name in property_names:
+        match = COUNT_FIELD_PATTERN.match(name)
+        if not match or match.group(1) not in MONTHS:
+            continue
+        month, year, slot = match.groups()
+        found.setdefault((2000 + int(year), MONTHS[month]), {})[slot.replace('_', '')] = name
+    if not found:
+        return DEFAULT_COUNT_FIELDS
+    return tuple(
+        found[period][slot]
+        for period in sorted(found)[-periods:]
+        for slot in COUNT_SLOTS
+        if slot in found[period]
+    )
+
+
+def recent_counts(props: Dict[str, Any], fields: Sequence[str] = DEFAULT_COUNT_FIELDS) -> List[int]:
+    """Non-zero counts from the given count columns, skipping unparseable values"""
+    counts = []
+    for field in fields:
+        if field in props and props[field] != "0":
+            try:
+                counts.append(int(props[field]))
+            except (ValueError, TypeError):
+                pass
+    return counts
+
+
+class PedestrianSites:
+    """Pedestrian counting sites as parallel arrays
+
+    avg_count holds each site's mean recent count (NaN when it has none) and
+    rounded_count the per-site value location_scout reports and averages.
+    count_fields lists the count columns the averages were taken over.
+    """
+
+    def __init__(self, lat, lng, avg_count, location: List[str], borough: List[str], count_fields: Sequence[str] = ()):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.avg_count = np.asarray(avg_count, dtype=np.float64)
+        self.has_counts = ~np.isnan(self.avg_count)
+        self.rounded_count = np.where(self.has_counts, np.round(np.nan_to_num(self.avg_count)), 0).astype(np.int64)
+        self.location = location
+        self.borough = borough
+        self.count_fields = tuple(count_fields)
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @classmethod
+    def from_geojson(cls, geojson: Dict[str, Any], count_fields: Optional[Sequence[str]] = None) -> 'PedestrianSites':
+        features = (geojson or {}).get('features', [])
+        if count_fields is None:
+            count_fields = detect_count_fields({name for feature in features for name in feature['properties']})
+
+        lat, lng, avg_count, location, borough = [], [], [], [], []
+        for feature in features:
+            coords = feature['geometry']['coordinates']
+            props = feature['properties']
+            counts = recent_counts(props, count_fields)
+
+            lng.append(coords[0])
+            lat.append(coords[1])
+            avg_count.append(sum(counts) / len(counts) if counts else np.nan)
+            location.append(props.get('street_nam', 'Unknown'))
+            borough.append(props.get('borough', 'Unknown'))
+        return cls(lat, lng, avg_count, location, borough, count_fields)
+
+
+class SubwayStations:
+    """Subway stations parsed once, with a haversine grid index for radius queries"""
+
+    def __init__(self, lat, lng, name: List[str], routes: List[str]):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.name = name
+        self.routes = routes
+        self.index = GridIndex(self.lat.tolist(), self.lng.tolist(), metric='haversine')
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @classmethod
+    def from_records(cls, stations: List[Dict[str, Any]]) -> 'SubwayStations':
+        lat, lng, name, routes = [], [], [], []
+        for station in stations or []:
+            try:
+                station_lat = float(station['gtfs_latitude'])
+                station_lng = float(station['gtfs_longitude'])
+            except (KeyError, ValueError, TypeError):
+                continue
+            lat.append(station_lat)
+            lng.append(station_lng)
+            name.append(station['stop_name'])
+            routes.append(station.get('daytime_routes', ''))
+        return cls(lat, lng, name, routes)
+
+    def within(self, lat: float, lng: float, radius_miles: float) -> List[Tuple[float, int]]:
+        """(distance, station) pairs within the radius, in dataset order"""
+        return sorted(self.index.query_radius(lat, lng, radius_miles), key=lambda match: match[1])
+
+    def nearest_distance(self, lat: float, lng: float) -> Optional[float]:
+        """Distance in miles to the closest station (None without stations)"""
+        nearest = self.index.nearest(lat, lng, k=1)
+        return nearest[0][0] if nearest else None
+
+
+class ScoutData(NamedTuple):
+    """One consistent set of location_scout datasets, replaced as a whole on reload"""
+    sites: PedestrianSites
+    stations: SubwayStations
+    version: str
+    raster: Optional[Any] = None  # ScoreRaster built from this version, if enabled
+
+
+def dataset_version(sites: PedestrianSites, stations: SubwayStations) -> str:
+    """Short content hash of the pre-processed datasets (changes whenever scores could)"""
+    digest = hashlib.sha256()
+    for values in (sites.lat, sites.lng, sites.avg_count, stations.lat, stations.lng):
+        digest.update(np.ascontiguousarray(values).tobytes())
+    for strings in (sites.location, sites.borough, stations.name, stations.routes):
+        digest.update('\x1f'.join(map(str, strings)).encode())
+    return digest.hexdigest()[:16]
+
+
+def haversine_np(lat, lng, lats, lngs):
+    """Vectorized haversine distance in miles from (lat, lng) to arrays of points"""
+    lat1, lng1 = np.radians(lat), np.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    dlng = lng2 - lng1
+    dlat = lat2 - lat1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return EARTH_RADIUS_MILES * (2 * np.arcsin(np.sqrt(a)))
@@ -0,0 +1,50 @@
+# single_flight.py
+"""
+Coalescing of identical concurrent async calls
+The first caller for a key starts the upstream call; callers arriving while
+it is in flight await the same task instead of issuing their own. The task is
+shielded, so a caller giving up (deadline, cancellation) does not cancel the
+call for the others, and a late result still reaches whatever it updates
+(e.g. a response cache).
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Deduplicates in-flight calls by key (results are shared between callers)"""
+
+    def __init__(self):
+        self.upstream = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Await call() for key, joining an identical call already in flight"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.upstream += 1
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[Any]"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here so callers that gave up don't log "never retrieved"
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "upstream": self.upstream,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
@@ -0,0 +1,62 @@
+# storefronts.py
+"""
+Vacant storefront inputs shared by the dataset builder and the cache prefetch job
+"""
+import json
+from pathlib import Path
+
+STOREFRONTS_FILE = Path(__file__).parent / 'data' / 'Storefronts_Vacant_or_Not.geojson'
+
+
+def load_vacant_storefronts(limit=5, data_path=STOREFRONTS_FILE):
+    """Load vacant storefront data from geojson file"""
+    try:
+        with open(data_path, 'r') as f:
+            data = json.load(f)
+        
+        vacant_storefronts = []
+        for feature in data.get('features', []):
+            if not feature:
+                continue
+                
+            props = feature.get('properties') or {}
+            geom = feature.get('geometry') or {}
+            
+            # Check if vacant (vacant_on_12_31 == 'Y' or == 'Yes')
+            vacant_status = props.get('vacant_on_12_31')
+            if vacant_status in ['Y', 'Yes']:
+                # Get coordinates
+                coords = geom.get('coordinates', [])
+                if len(coords) >= 2 and coords[0] and coords[1]:
+                    try:
+                        storefront = {
+                            'address': props.get('property_street_address_or', 'Unknown Address'),
+                            'borough': props.get('borough', 'MANHATTAN'),
+                            'neighborhood': props.get('nbhd') or props.get('nta') or 'Unknown',
+                            'latitude': float(coords[1]),
+                            'longitude': float(coords[0]),
+                            'business_activity': props.get('primary_business_activity', 'retail'),
+                            'zip_code': props.get('zip_code', ''),
+                        }
+                        vacant_storefronts.append(storefront)
+                        
+                        if len(vacant_storefronts) >= limit:
+                            break
+                    except (ValueError, TypeError) as e:
+                        # Skip invalid coordinates
+                        continue
+        
+        return vacant_storefronts
+    except Exception as e:
+        print(f"Error loading vacant storefronts: {e}")
+        import traceback
+        traceback.print_exc()
+        return []
+
+
+def storefront_business_type(storefront: dict) -> str:
+    """Business type used for a storefront's requests (default to retail if not specified)"""
+    business_type = storefront.get('business_activity', 'retail')
+    if not business_type or business_type.lower() in ['', 'none', 'unknown']:
+        business_type = 'retail'
+    return business_type
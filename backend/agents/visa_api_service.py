@@ -3,14 +3,46 @@
 Visa Merchant Search API Service
 Handles interactions with Visa's Merchant Search API v2 to get real merchant data
 Endpoint: https://sandbox.api.visa.com/merchantsearch/v2/search
+Calls run within the caller's deadline and behind a circuit breaker (resilience.py),
+so a degraded API fails fast to the benchmark fallback instead of stalling analyses
+
+The client is async (aiohttp): one ClientSession holds a pool of keep-alive
+connections, so the TLS handshake (with the VISA_API_CERT_PATH / VISA_API_KEY_PATH
+client certificate, loaded once) is paid per connection rather than per call,
+and a semaphore bounds how many searches hit the API at once
+
+Parsed results are cached under a key made of the geohash cell of the location,
+the radius (rounded to VISA_API_CACHE_RADIUS_STEP meters, and searched with that
+rounded radius) and the business type. Entries record when they expire and live
+on disk (size-bounded, LRU-evicted) behind an in-memory LRU, so a hit costs
+neither file I/O nor parsing
+
+get_nearby_merchants_batch serves bulk builds: it groups the lookups by area
+tile (geohash cell), searches from each tile's center with a radius covering
+every lookup plus the lookup radius (paging through startIndex only until each
+lookup's nearest merchants are known), and answers those locations by
+filtering the merchants by distance locally
 """
+import asyncio
 import os
-import requests
+import ssl
+import sys
 import json
-import hashlib
-from typing import Dict, List, Optional, Any
+import time
+from math import ceil
+from typing import Dict, List, Optional, Any, Sequence, Tuple, Union
 from pathlib import Path
 
+import aiohttp
+
+# Add parent directory to path to import the record/replay and resilience layers
+sys.path.append(str(Path(__file__).parent.parent))
+from api_replay import recorded_async, replaying
+from resilience import CircuitOpenError, Deadline, DeadlineExceeded, Resilience
+from geohash_utils import geohash_center, geohash_encode, haversine_meters
+from memo_cache import TTLLRUCache
+from response_cache import ResponseCache
+
 # Visa API Configuration
 VISA_API_BASE_URL = os.getenv("VISA_API_BASE_URL", "https://sandbox.api.visa.com")
 VISA_API_USER_ID = os.getenv("VISA_API_USER_ID", "")
@@ -18,17 +50,236 @@ VISA_API_PASSWORD = os.getenv("VISA_API_PASSWORD", "")
 VISA_API_CERT_PATH = os.getenv("VISA_API_CERT_PATH", "")
 VISA_API_KEY_PATH = os.getenv("VISA_API_KEY_PATH", "")
 
-# Cache directory for API responses
-CACHE_DIR = Path(".cache/visa_api")
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+# Longest a single call may take (callers' deadlines can only shorten it)
+VISA_API_TIMEOUT = float(os.getenv("VISA_API_TIMEOUT", "15"))
+# Consecutive failures that open the breaker, seconds before a trial call, and hedging
+VISA_API_BREAKER_FAILURES = int(os.getenv("VISA_API_BREAKER_FAILURES", "5"))
+VISA_API_BREAKER_RESET = float(os.getenv("VISA_API_BREAKER_RESET", "30"))
+VISA_API_HEDGE = os.getenv("VISA_API_HEDGE", "0") == "1"
+# Searches in flight at once, and pooled connections to the API host
+VISA_API_MAX_CONCURRENCY = int(os.getenv("VISA_API_MAX_CONCURRENCY", "8"))
+VISA_API_POOL_SIZE = int(os.getenv("VISA_API_POOL_SIZE", str(VISA_API_MAX_CONCURRENCY)))
+
+visa_resilience = Resilience(
+    "visa",
+    timeout_cap=VISA_API_TIMEOUT,
+    failure_threshold=VISA_API_BREAKER_FAILURES,
+    reset_timeout=VISA_API_BREAKER_RESET,
+    hedge=VISA_API_HEDGE,
+)
+
+# Parsed-result cache (location, TTL, LRU bounds and key quantization; 0 TTL disables it)
+VISA_CACHE_DIR = Path(os.getenv("VISA_API_CACHE_DIR", Path(__file__).parent / ".cache" / "visa"))
+VISA_CACHE_TTL = float(os.getenv("VISA_API_CACHE_TTL", str(7 * 24 * 3600)))
+VISA_CACHE_MAX_ENTRIES = int(os.getenv("VISA_API_CACHE_MAX_ENTRIES", "5000"))
+VISA_MEMORY_CACHE_SIZE = int(os.getenv("VISA_API_MEMORY_CACHE_SIZE", "1024"))
+VISA_CACHE_PRECISION = int(os.getenv("VISA_API_CACHE_PRECISION", "8"))  # ~38 m x 19 m cells
+VISA_CACHE_RADIUS_STEP = int(os.getenv("VISA_API_CACHE_RADIUS_STEP", "100"))
+
+visa_cache = ResponseCache(VISA_CACHE_DIR, VISA_CACHE_TTL, VISA_CACHE_MAX_ENTRIES, name="visa cache")
+visa_memory_cache = TTLLRUCache(max_entries=VISA_MEMORY_CACHE_SIZE, ttl=VISA_CACHE_TTL)
+
+# Merchants returned per location (and per page of a search)
+MAX_RECORDS = 10
+# Batched lookups: tile size (precision 6 is ~1.2 km x 0.6 km), most pages fetched per tile,
+# and how many lookups a tile needs before one wide search beats individual ones
+VISA_TILE_PRECISION = int(os.getenv("VISA_API_TILE_PRECISION", "6"))
+VISA_TILE_MAX_PAGES = int(os.getenv("VISA_API_TILE_MAX_PAGES", "10"))
+VISA_TILE_MIN_LOCATIONS = int(os.getenv("VISA_API_TILE_MIN_LOCATIONS", "2"))
+# Tile-answered lookups per batch that are also searched individually and compared (0 disables)
+VISA_TILE_PARITY_CHECKS = int(os.getenv("VISA_API_TILE_PARITY_CHECKS", "0"))
+
+# Batched lookups answered from tile searches, and parity checks run / failed
+tile_stats = {"tile_pages": 0, "tile_answers": 0, "fallbacks": 0, "parity_checks": 0, "parity_mismatches": 0}
+
+_session: Optional[aiohttp.ClientSession] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_ssl_context: Optional[ssl.SSLContext] = None
+
+
+class VisaUnavailable(RuntimeError):
+    """The Visa API answered with a server error or throttled the request"""
+
+
+def _get_ssl_context() -> ssl.SSLContext:
+    """TLS context with the client certificate for Visa's two-way SSL (loaded once)"""
+    global _ssl_context
+    if _ssl_context is None:
+        context = ssl.create_default_context()
+        if VISA_API_CERT_PATH:
+            try:
+                context.load_cert_chain(VISA_API_CERT_PATH, VISA_API_KEY_PATH or None)
+            except (OSError, ssl.SSLError) as e:
+                print(f"⚠️  Could not load Visa client certificate: {e}")
+        _ssl_context = context
+    return _ssl_context
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Shared session (created on first use inside the running event loop)"""
+    global _session, _semaphore
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=VISA_API_POOL_SIZE, ttl_dns_cache=300, ssl=_get_ssl_context())
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            auth=aiohttp.BasicAuth(VISA_API_USER_ID, VISA_API_PASSWORD),
+        )
+        _semaphore = asyncio.Semaphore(VISA_API_MAX_CONCURRENCY)
+    return _session
+
+
+async def close_session():
+    """Close the shared session (call on agent shutdown)"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def _post(url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    session = _get_session()
+    headers = {
+        "Accept": "application/json",
+        "Content-Type": "application/json"
+    }
+    async with _semaphore:
+        async with session.post(url, json=payload, headers=headers) as response:
+            if response.status >= 500 or response.status == 429:
+                raise VisaUnavailable(f"HTTP {response.status}")
+            return {"status_code": response.status, "text": await response.text()}
+
+
+def quantize_radius(radius: int) -> int:
+    """Radius rounded to the cache's radius step (never below one step)"""
+    step = max(1, VISA_CACHE_RADIUS_STEP)
+    return max(step, int(round(radius / step)) * step)
+
+
+def cache_key(lat: float, lng: float, business_type: str, radius: int) -> str:
+    """Cache key shared by all queries in the same geohash cell and radius step"""
+    return f"v2|{business_type}|{quantize_radius(radius)}|{geohash_encode(lat, lng, VISA_CACHE_PRECISION)}"
+
+
+def cached_merchants(key: str, count: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Parsed merchant data for key from memory, then disk (None when missing or expired)
+
+    count=False only checks: no cache stats are counted and nothing is promoted to memory
+    """
+    entry = visa_memory_cache.get(key, count=count)
+    if entry is None:
+        entry = visa_cache.get(key, count=count)
+        if entry is None:
+            return None
+        remaining = entry["expires_at"] - time.time()
+        if remaining <= 0:
+            return None
+        if count:
+            visa_memory_cache.set(key, entry, ttl=remaining)
+    return entry["merchants"]
+
+
+async def cached_merchants_async(key: str) -> Optional[Dict[str, Any]]:
+    """cached_merchants for the event loop: memory hits inline, disk reads in a worker thread"""
+    if visa_memory_cache.get(key, count=False) is not None:
+        return cached_merchants(key)
+    return await asyncio.to_thread(cached_merchants, key)
+
+
+async def _store_merchants(key: str, merchants: Dict[str, Any]):
+    entry = {"expires_at": time.time() + VISA_CACHE_TTL, "merchants": merchants}
+    visa_memory_cache.set(key, entry)
+    await visa_cache.set_async(key, entry)
+
+
+def _credentials_configured() -> bool:
+    # Not needed when replaying recorded responses
+    if not replaying() and (not VISA_API_USER_ID or not VISA_API_PASSWORD):
+        print("⚠️  Visa API credentials not configured. Skipping API call.")
+        return False
+    return True
+
+
+async def _search_merchants(
+    lat: float,
+    lng: float,
+    radius: int,
+    deadline: Deadline,
+    start_index: int = 0,
+) -> Optional[Dict[str, Any]]:
+    """
+    One Merchant Search request (up to MAX_RECORDS merchants from start_index)
+    
+    Returns:
+        The decoded response body, or None if the API answered with an error status
+    
+    Raises:
+        CircuitOpenError, DeadlineExceeded, asyncio.TimeoutError, aiohttp.ClientError, VisaUnavailable
+    """
+    # Visa Merchant Search API v2 endpoint
+    url = f"{VISA_API_BASE_URL}/merchantsearch/v2/search"
+    
+    # Generate proper timestamp for messageDateTime
+    from datetime import datetime
+    message_datetime = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.000")
+    
+    # Generate unique request ID
+    request_id = f"Vantage_Locator_{int(time.time() * 1000)}"
+    
+    # Prepare request body matching Visa's exact format
+    # Based on official Visa Merchant Search API documentation
+    payload = {
+        "searchOptions": {
+            "matchScore": "false",
+            "maxRecords": str(MAX_RECORDS),
+            "matchIndicators": "true"
+        },
+        "header": {
+            "startIndex": str(start_index),
+            "requestMessageId": request_id,
+            "messageDateTime": message_datetime
+        },
+        "searchAttrList": {
+            "distanceUnit": "m",
+            "distance": str(int(radius)),
+            "merchantCountryCode": 840,
+            "latitude": str(lat),
+            "longitude": str(lng)
+        },
+        "responseAttrList": [
+            "GNLOCATOR"
+        ]
+    }
+    
+    # Make API request with basic authentication (set on the session) over the pooled mTLS connections
+    print(f"🔑 Making Visa API request to: {url}")
+    print(f"📍 Location: ({lat}, {lng}), Radius: {radius}m")
+    
+    # Request ID and timestamp change every call, so the header is not part of the recorded request
+    request = {k: v for k, v in payload.items() if k != "header"}
+    if start_index:
+        request["startIndex"] = start_index
+    response = await recorded_async(
+        "visa",
+        request,
+        lambda: visa_resilience.call_async(lambda: _post(url, payload), deadline)
+    )
+    
+    print(f"📡 Visa API Response Status: {response['status_code']}")
+    
+    if response['status_code'] != 200:
+        print(f"⚠️  Visa API returned status {response['status_code']}: {response['text']}")
+        return None
+    return json.loads(response['text'])
 
 
-def get_nearby_merchants(
+async def get_nearby_merchants(
     lat: float,
     lng: float,
     business_type: str,
     radius: int = 1000,
-    use_cache: bool = True
+    use_cache: bool = True,
+    deadline: Optional[Union[Deadline, float]] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Get nearby merchants from Visa Merchant Locator API
@@ -39,106 +290,44 @@ def get_nearby_merchants(
         business_type: Type of business (e.g., "restaurant", "coffee shop")
         radius: Search radius in meters (default: 1000m)
         use_cache: Whether to use cached responses (default: True)
+        deadline: The request's Deadline, or seconds allowed (default: VISA_API_TIMEOUT)
     
     Returns:
-        Dictionary containing merchant data, or None if API call fails
+        Dictionary containing merchant data, or None if the API call fails,
+        times out or the circuit is open
     """
     # Check cache first
-    if use_cache:
-        cache_key = f"{lat}_{lng}_{business_type}_{radius}"
-        cache_hash = hashlib.md5(cache_key.encode()).hexdigest()
-        cache_path = CACHE_DIR / f"{cache_hash}.json"
-        
-        if cache_path.exists():
-            try:
-                with open(cache_path, "r") as f:
-                    cached_data = json.load(f)
-                    print(f"💰 Loading Visa API data from cache: {cache_path}")
-                    return cached_data
-            except Exception as e:
-                print(f"Warning: Could not load cache: {e}")
-    
-    # Check if API credentials are configured
-    if not VISA_API_USER_ID or not VISA_API_PASSWORD:
-        print("⚠️  Visa API credentials not configured. Skipping API call.")
+    key = cache_key(lat, lng, business_type, radius) if use_cache and VISA_CACHE_TTL > 0 else None
+    if key is not None:
+        cached = await cached_merchants_async(key)
+        if cached is not None:
+            print(f"💰 Loaded Visa merchant data from cache ({visa_memory_cache.hits} memory / {visa_cache.hits} disk hits)")
+            return cached
+    # Search with the radius the cache key stands for
+    radius = quantize_radius(radius)
+    
+    if not _credentials_configured():
         return None
     
     try:
-        # Visa Merchant Search API v2 endpoint
-        url = f"{VISA_API_BASE_URL}/merchantsearch/v2/search"
-        
-        # Prepare request headers
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/json"
-        }
-        
-        # Generate proper timestamp for messageDateTime
-        from datetime import datetime
-        message_datetime = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.000")
-        
-        # Generate unique request ID
-        import time
-        request_id = f"Vantage_Locator_{int(time.time() * 1000)}"
-        
-        # Prepare request body matching Visa's exact format
-        # Based on official Visa Merchant Search API documentation
-        payload = {
-            "searchOptions": {
-                "matchScore": "false",
-                "maxRecords": "10",
-                "matchIndicators": "true"
-            },
-            "header": {
-                "startIndex": "0",
-                "requestMessageId": request_id,
-                "messageDateTime": message_datetime
-            },
-            "searchAttrList": {
-                "distanceUnit": "m",
-                "distance": str(int(radius)),
-                "merchantCountryCode": 840,
-                "latitude": str(lat),
-                "longitude": str(lng)
-            },
-            "responseAttrList": [
-                "GNLOCATOR"
-            ]
-        }
-        
-        # Make API request with basic authentication
-        # Using API Key as username and password for authentication
-        print(f"🔑 Making Visa API request to: {url}")
-        print(f"📍 Location: ({lat}, {lng}), Radius: {radius}m")
-        
-        response = requests.post(
-            url,
-            json=payload,
-            headers=headers,
-            auth=(VISA_API_USER_ID, VISA_API_PASSWORD),
-            timeout=15,
-            verify=True  # Verify SSL certificate
-        )
+        data = await _search_merchants(lat, lng, radius, Deadline.coerce(deadline, VISA_API_TIMEOUT))
+        if data is None:
+            return None
+        merchants = parse_visa_response(data, business_type)
         
-        print(f"📡 Visa API Response Status: {response.status_code}")
+        # Cache the parsed result, so hits need no parsing
+        if key is not None and merchants is not None:
+            await _store_merchants(key, merchants)
         
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Cache the response
-            if use_cache:
-                try:
-                    with open(cache_path, "w") as f:
-                        json.dump(data, f, indent=2)
-                except Exception as e:
-                    print(f"Warning: Could not cache response: {e}")
-            
-            return parse_visa_response(data, business_type)
-        else:
-            print(f"⚠️  Visa API returned status {response.status_code}: {response.text}")
-            return None
+        return merchants
             
-    except requests.exceptions.RequestException as e:
+    except CircuitOpenError:
+        print("⚠️  Visa API circuit is open. Skipping API call.")
+        return None
+    except (asyncio.TimeoutError, DeadlineExceeded):
+        print(f"⚠️  Visa API call timed out for ({lat}, {lng})")
+        return None
+    except (aiohttp.ClientError, VisaUnavailable) as e:
         print(f"⚠️  Visa API request failed: {e}")
         return None
     except Exception as e:
@@ -146,6 +335,205 @@ def get_nearby_merchants(
         return None
 
 
+async def _tile_search(
+    tile: str,
+    members: List[Tuple[int, float, float]],
+    radius: int,
+    deadline: Deadline
+) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    One paged search answering several lookups in a tile
+
+    The search is centered on the member nearest the tile's center, with a
+    radius reaching every member's radius. Results come nearest to the center
+    first, so after each page nothing unfetched lies closer to the center than
+    the last merchant (fetched_radius). A member at offset d from the center is
+    settled once its MAX_RECORDS-th nearest fetched merchant (or its radius, if
+    closer) lies within fetched_radius - d: no unfetched merchant can change its
+    answer, which is the API's own nearest-first top MAX_RECORDS. The center
+    member is settled by the first page, so a tile never costs more calls than
+    searching its members individually. Paging stops when every member is
+    settled, or once another page could not save a call (pages + unsettled
+    members would reach the member count).
+
+    Args:
+        members: (index, latitude, longitude) of each lookup in the tile
+
+    Returns:
+        Nearby merchants (with distances) by member index, for settled members only
+    """
+    tile_lat, tile_lng = geohash_center(tile)
+    _, lat, lng = min(members, key=lambda m: haversine_meters(tile_lat, tile_lng, m[1], m[2]))
+    offsets = {i: haversine_meters(lat, lng, m_lat, m_lng) for i, m_lat, m_lng in members}
+    tile_radius = int(ceil(max(offsets.values()) + radius))
+    located: List[Tuple[Dict[str, Any], float, float]] = []
+    settled: Dict[int, List[Tuple[float, Dict[str, Any]]]] = {}
+    pages = 0
+    try:
+        while len(settled) < len(members):
+            data = await _search_merchants(lat, lng, tile_radius, deadline, start_index=pages * MAX_RECORDS)
+            pages += 1
+            if data is None:
+                break
+            page = [_merchant_info(m) for m in (data.get("response") or {}).get("merchant") or []]
+            for info in page:
+                located.append((info, float(info["latitude"]), float(info["longitude"])))
+            if len(page) < MAX_RECORDS:
+                fetched_radius = float("inf")
+            else:
+                fetched_radius = haversine_meters(lat, lng, *located[-1][1:])
+            for i, m_lat, m_lng in members:
+                if i in settled:
+                    continue
+                nearby = sorted(
+                    ((haversine_meters(m_lat, m_lng, info_lat, info_lng), info) for info, info_lat, info_lng in located),
+                    key=lambda pair: pair[0]
+                )
+                nearby = [pair for pair in nearby[:MAX_RECORDS] if pair[0] <= radius]
+                needed = nearby[-1][0] if len(nearby) == MAX_RECORDS else radius
+                if needed <= fetched_radius - offsets[i]:
+                    settled[i] = nearby
+            unsettled = len(members) - len(settled)
+            if fetched_radius == float("inf") or pages >= VISA_TILE_MAX_PAGES or pages + unsettled >= len(members):
+                break
+    except (TypeError, ValueError):
+        print(f"⚠️  Visa tile {tile} returned merchants without coordinates")
+        settled = {}
+    except Exception as e:
+        print(f"⚠️  Visa tile search failed for {tile}: {e}")
+        settled = {}
+    tile_stats["tile_pages"] += pages
+    return {
+        i: [{**info, "distance": str(int(round(distance)))} for distance, info in nearby]
+        for i, nearby in settled.items()
+    }
+
+
+async def _check_parity(
+    locations: Sequence[Tuple[float, float]],
+    indexes: List[int],
+    results: List[Optional[Dict[str, Any]]],
+    business_type: str,
+    radius: int,
+    deadline: Deadline
+):
+    """Search tile-answered lookups individually and report answers that differ"""
+    singles = await asyncio.gather(*(
+        get_nearby_merchants(*locations[i], business_type, radius, use_cache=False, deadline=deadline)
+        for i in indexes
+    ))
+    for i, single in zip(indexes, singles):
+        tile_stats["parity_checks"] += 1
+        names = [m["name"] for m in (results[i] or {}).get("merchants", [])]
+        expected = [m["name"] for m in (single or {}).get("merchants", [])]
+        if single is not None and names != expected:
+            tile_stats["parity_mismatches"] += 1
+            print(f"⚠️  Visa tile answer for {locations[i]} differs from a single search: {names} vs {expected}")
+
+
+async def get_nearby_merchants_batch(
+    locations: Sequence[Tuple[float, float]],
+    business_type: str,
+    radius: int = 1000,
+    deadline: Optional[Union[Deadline, float]] = None
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    get_nearby_merchants for many locations, with one paged search per area tile
+    
+    Lookups answered by the cache are not searched again. Tiles with fewer than
+    VISA_TILE_MIN_LOCATIONS pending lookups, and lookups a tile search did not
+    settle (see _tile_search), fall back to individual searches, so a batch costs
+    at most one call more per tile than searching every lookup individually.
+    Results are cached per location like single lookups. With
+    VISA_API_TILE_PARITY_CHECKS set, that many tile answers are compared with
+    individual searches (tile_stats counts checks and mismatches).
+    
+    Args:
+        locations: (latitude, longitude) pairs
+        business_type: Type of business (e.g., "restaurant", "coffee shop")
+        radius: Search radius in meters around each location (default: 1000m)
+        deadline: Deadline for the whole batch, or seconds allowed
+            (default: VISA_API_TIMEOUT per page of a tile search)
+    
+    Returns:
+        Merchant data (or None) for each location, in order
+    """
+    deadline = Deadline.coerce(deadline, VISA_API_TIMEOUT * VISA_TILE_MAX_PAGES)
+    radius = quantize_radius(radius)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(locations)
+    tiles: Dict[str, List[int]] = {}
+    for i, (lat, lng) in enumerate(locations):
+        cached = await cached_merchants_async(cache_key(lat, lng, business_type, radius)) if VISA_CACHE_TTL > 0 else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            tiles.setdefault(geohash_encode(lat, lng, VISA_TILE_PRECISION), []).append(i)
+    if not tiles or not _credentials_configured():
+        return results
+
+    batched = {tile: indexes for tile, indexes in tiles.items() if len(indexes) >= VISA_TILE_MIN_LOCATIONS}
+    print(f"🗺️  Visa batch: {len(locations)} locations, {len(locations) - sum(map(len, tiles.values()))} cached, "
+          f"{len(batched)} tile searches")
+    answers = await asyncio.gather(*(
+        _tile_search(tile, [(i, *locations[i]) for i in indexes], radius, deadline)
+        for tile, indexes in batched.items()
+    ))
+
+    individual = []
+    tile_answered = []
+    for tile, settled in zip(batched, answers):
+        for i in batched[tile]:
+            if i not in settled:
+                individual.append(i)
+                continue
+            tile_answered.append(i)
+            results[i] = _merchant_summary(settled[i], business_type) if settled[i] else None
+            if results[i] is not None and VISA_CACHE_TTL > 0:
+                await _store_merchants(cache_key(*locations[i], business_type, radius), results[i])
+    individual.extend(i for tile, indexes in tiles.items() if tile not in batched for i in indexes)
+    tile_stats["tile_answers"] += len(tile_answered)
+    tile_stats["fallbacks"] += len(individual)
+
+    singles = await asyncio.gather(*(
+        get_nearby_merchants(*locations[i], business_type, radius, deadline=deadline) for i in individual
+    ))
+    for i, single in zip(individual, singles):
+        results[i] = single
+    if VISA_TILE_PARITY_CHECKS > 0 and tile_answered:
+        await _check_parity(locations, tile_answered[:VISA_TILE_PARITY_CHECKS], results, business_type, radius, deadline)
+    return results
+
+
+def _merchant_info(merchant: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": merchant.get("visaMerchantName", "Unknown"),
+        "street_address": merchant.get("visaStoreStreetAddress", ""),
+        "city": merchant.get("visaStoreCity", ""),
+        "state": merchant.get("visaStoreState", ""),
+        "postal_code": merchant.get("visaStorePostalCode", ""),
+        "country_code": merchant.get("visaStoreCountryCode", ""),
+        "latitude": merchant.get("locationAddressLatitude", ""),
+        "longitude": merchant.get("locationAddressLongitude", ""),
+        "merchant_category_code": merchant.get("merchantCategoryCode", ""),
+        "distance": merchant.get("distance", "")
+    }
+
+
+def _merchant_summary(merchants: List[Dict[str, Any]], business_type: str) -> Dict[str, Any]:
+    # Note: Transaction volume data may not be available in public API
+    # This would typically come from Visa's analytics products
+    total_transaction_volume = 0
+    merchant_count = len(merchants)
+    return {
+        "merchants": merchants,
+        "merchant_count": merchant_count,
+        "total_transaction_volume": total_transaction_volume,
+        "average_transaction_volume": total_transaction_volume / merchant_count if merchant_count > 0 else 0,
+        "data_source": "visa_merchant_search_v2",
+        "business_type": business_type
+    }
+
+
 def parse_visa_response(api_response: Dict, business_type: str) -> Optional[Dict[str, Any]]:
     """
     Parse Visa Merchant Search API v2 response and extract relevant merchant data
@@ -168,40 +556,12 @@ def parse_visa_response(api_response: Dict, business_type: str) -> Optional[Dict
             return None
         
         # Filter and process merchants
-        relevant_merchants = []
-        total_transaction_volume = 0
-        merchant_count = 0
-        
-        for merchant in merchants:
-            merchant_info = {
-                "name": merchant.get("visaMerchantName", "Unknown"),
-                "street_address": merchant.get("visaStoreStreetAddress", ""),
-                "city": merchant.get("visaStoreCity", ""),
-                "state": merchant.get("visaStoreState", ""),
-                "postal_code": merchant.get("visaStorePostalCode", ""),
-                "country_code": merchant.get("visaStoreCountryCode", ""),
-                "latitude": merchant.get("locationAddressLatitude", ""),
-                "longitude": merchant.get("locationAddressLongitude", ""),
-                "merchant_category_code": merchant.get("merchantCategoryCode", ""),
-                "distance": merchant.get("distance", "")
-            }
-            relevant_merchants.append(merchant_info)
-            merchant_count += 1
-            
-            # Note: Transaction volume data may not be available in public API
-            # This would typically come from Visa's analytics products
+        relevant_merchants = [_merchant_info(merchant) for merchant in merchants]
         
-        print(f"✅ Parsed {merchant_count} merchants from Visa API response")
+        print(f"✅ Parsed {len(relevant_merchants)} merchants from Visa API response")
         
         # Return aggregated data
-        return {
-            "merchants": relevant_merchants,
-            "merchant_count": merchant_count,
-            "total_transaction_volume": total_transaction_volume,
-            "average_transaction_volume": total_transaction_volume / merchant_count if merchant_count > 0 else 0,
-            "data_source": "visa_merchant_search_v2",
-            "business_type": business_type
-        }
+        return _merchant_summary(relevant_merchants, business_type)
         
     except Exception as e:
         print(f"⚠️  Error parsing Visa API response: {e}")
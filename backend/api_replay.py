@@ -0,0 +1,126 @@
+"""
+Record/replay layer for third-party API calls (Places, Visa, RentCast)
+
+VANTAGE_API_MODE selects how wrapped calls behave:
+    live    call the API (default)
+    record  call the API and save each response to the cassette store
+    replay  never touch the network; serve saved responses after a synthetic
+            delay, so pipeline throughput and latency can be benchmarked offline
+
+Cassettes are JSON files under VANTAGE_CASSETTE_DIR, one per distinct request,
+named by the SHA-256 of the service and the normalized request (credentials
+must not be part of the request). Replay latency is VANTAGE_REPLAY_LATENCY
+seconds (per service: VANTAGE_REPLAY_LATENCY_PLACES, ...), or "recorded" to
+reuse the latency measured while recording; VANTAGE_REPLAY_JITTER adds a
+deterministic +/- fraction derived from the request, so runs are repeatable.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+API_MODE = os.getenv('VANTAGE_API_MODE', 'live').lower()
+CASSETTE_DIR = Path(os.getenv('VANTAGE_CASSETTE_DIR', Path(__file__).parent / '.cache' / 'cassettes'))
+REPLAY_LATENCY = os.getenv('VANTAGE_REPLAY_LATENCY', '0')
+REPLAY_JITTER = float(os.getenv('VANTAGE_REPLAY_JITTER', '0'))
+
+MODES = ('live', 'record', 'replay')
+if API_MODE not in MODES:
+    raise ValueError(f"VANTAGE_API_MODE must be one of {MODES}, got {API_MODE!r}")
+
+
+class CassetteNotFound(LookupError):
+    """Replay mode was asked for a request that was never recorded"""
+
+
+def replaying() -> bool:
+    return API_MODE == 'replay'
+
+
+def request_digest(service: str, request: Dict[str, Any]) -> str:
+    normalized = json.dumps({'service': service, 'request': request}, sort_keys=True, default=str)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def _cassette_path(service: str, digest: str) -> Path:
+    return CASSETTE_DIR / service / f"{digest}.json"
+
+
+def _save(service: str, request: Dict[str, Any], response: Any, elapsed: float):
+    digest = request_digest(service, request)
+    path = _cassette_path(service, digest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = json.dumps({
+        'service': service,
+        'request': request,
+        'response': response,
+        'elapsed': elapsed,
+        'recorded_at': time.time(),
+    }, default=str).encode()
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _load(service: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    digest = request_digest(service, request)
+    try:
+        with open(_cassette_path(service, digest), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        raise CassetteNotFound(f"No {service} cassette for {request}") from None
+
+
+def replay_delay(service: str, request: Dict[str, Any], recorded_elapsed: Optional[float]) -> float:
+    """Synthetic latency for a replayed call (seconds)"""
+    setting = os.getenv(f'VANTAGE_REPLAY_LATENCY_{service.upper()}', REPLAY_LATENCY)
+    if setting == 'recorded':
+        delay = recorded_elapsed or 0.0
+    else:
+        delay = float(setting)
+    if REPLAY_JITTER and delay:
+        # Map the request digest to [-1, 1) so the same request always gets the same jitter
+        unit = int(request_digest(service, request)[:8], 16) / 0x80000000 - 1
+        delay *= 1 + REPLAY_JITTER * unit
+    return max(delay, 0.0)
+
+
+def recorded(service: str, request: Dict[str, Any], call: Callable[[], Any]) -> Any:
+    """
+    Run call() according to VANTAGE_API_MODE
+
+    Args:
+        service: Cassette namespace (e.g. 'places', 'visa', 'rentcast')
+        request: JSON-serializable description of the request, without secrets
+        call: Performs the real request and returns a JSON-serializable response
+
+    Raises:
+        CassetteNotFound: In replay mode, when the request was never recorded
+    """
+    if API_MODE == 'replay':
+        cassette = _load(service, request)
+        time.sleep(replay_delay(service, request, cassette.get('elapsed')))
+        return cassette['response']
+    started = time.monotonic()
+    response = call()
+    if API_MODE == 'record':
+        _save(service, request, response, time.monotonic() - started)
+    return response
+
+
+async def recorded_async(service: str, request: Dict[str, Any], call: Callable[[], Awaitable[Any]]) -> Any:
+    """recorded() for coroutine calls; replay delays use asyncio.sleep"""
+    if API_MODE == 'replay':
+        import asyncio
+        cassette = _load(service, request)
+        await asyncio.sleep(replay_delay(service, request, cassette.get('elapsed')))
+        return cassette['response']
+    started = time.monotonic()
+    response = await call()
+    if API_MODE == 'record':
+        _save(service, request, response, time.monotonic() - started)
+    return response
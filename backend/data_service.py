@@ -1,13 +1,24 @@
 """
 Data Service for fetching rent prices, vacant spots, and demographics
 Integrates with NYC Open Data, RentCast API, and local data files
+
+Importing this module does no I/O: local datasets are loaded on first use
+(or up front via data_service.warm()) and `requests` is imported only when
+a fetcher actually runs, so CLI tools and tests start quickly. Remote
+fetches share a pooled session and TTL disk cache (see http_cache.py).
 """
 import json
 import os
-import requests
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from pathlib import Path
 
+from api_replay import recorded
+from demographics_engine import DemographicsEngine
+from http_cache import cached_get
+from spatial_index import GridIndex
+
 # API Keys (must be in environment variables)
 NYC_TOKEN = os.getenv('NYC_DATA_TOKEN')
 RENTCAST_KEY = os.getenv('RENTCAST_API_KEY')
@@ -18,6 +29,12 @@ POPULATION_URL = 'https://data.cityofnewyork.us/resource/swpk-hqdp.json'
 CENSUS_URL = 'https://api.census.gov/data/2022/acs/acs5?get=NAME,B01002_001E,B19013_001E,B01003_001E&for=county:005,047,061,081,085&in=state:36'
 RENTCAST_URL = 'https://api.rentcast.io/v1/listings/rental'
 
+# Shared deadline (seconds) for all demographics sources fetched together
+DEMOGRAPHICS_DEADLINE = 10
+# Seconds before retrying neighborhood shapes after a failed fetch (doubles per failure, capped)
+DEMOGRAPHICS_RETRY_BASE = 5
+DEMOGRAPHICS_RETRY_MAX = 300
+
 # Data directory
 DATA_DIR = Path(__file__).parent / 'data'
 
@@ -26,33 +43,94 @@ class DataService:
     """Service for fetching and managing location data"""
     
     def __init__(self):
-        self.rent_listings = []
-        self.business_licenses = []
+        # (listings, index, positions) replaced as one tuple; readers take it once per call
+        self._rent_snapshot = ([], GridIndex([], []), [])
         self.demographics = {}
         self.neighborhoods = None
+        self._demographics_engine = None
+        self._demographics_lock = threading.Lock()
+        # Citywide-defaults engine served while neighborhood shapes are unavailable
+        self._fallback_demographics_engine = None
+        self._demographics_build_lock = threading.Lock()
+        self._demographics_failures = 0
+        self._demographics_retry_at = 0.0
+        # Local datasets are loaded lazily on first access (see warm())
+        self._business_licenses = None
+        self._license_index = None
+        self._license_rows = []
+        self._local_data_lock = threading.Lock()
+    
+    @property
+    def rent_listings(self) -> List[Dict]:
+        return self._rent_snapshot[0]
+    
+    @rent_listings.setter
+    def rent_listings(self, listings: List[Dict]):
+        self._set_rent_listings(listings)
+    
+    @property
+    def business_licenses(self) -> List[Dict]:
+        if self._business_licenses is None:
+            self._load_local_data()
+        return self._business_licenses
+    
+    @business_licenses.setter
+    def business_licenses(self, licenses: List[Dict]):
+        self._build_license_index(licenses)
+        self._business_licenses = licenses
+    
+    def warm(self, fetch_remote: bool = False) -> 'DataService':
+        """Load datasets and build the demographics engine up front (for servers) instead of on the first request"""
         self._load_local_data()
+        if fetch_remote:
+            self.fetch_rent_listings()
+            self.fetch_demographics()
+        self._build_demographics_engine()
+        return self
     
     def _load_local_data(self):
-        """Load data from local JSON files"""
-        try:
-            # Load business licenses (potential vacant spots)
-            biz_file = DATA_DIR / 'business_licenses.json'
-            if biz_file.exists():
-                with open(biz_file, 'r') as f:
-                    self.business_licenses = json.load(f)
-                    print(f"Loaded {len(self.business_licenses)} business licenses")
-        except Exception as e:
-            print(f"Error loading local data: {e}")
+        """Load data from local JSON files (once)"""
+        with self._local_data_lock:
+            if self._business_licenses is not None:
+                return
+            licenses = []
+            try:
+                # Load business licenses (potential vacant spots)
+                biz_file = DATA_DIR / 'business_licenses.json'
+                if biz_file.exists():
+                    with open(biz_file, 'r') as f:
+                        licenses = json.load(f)
+                        print(f"Loaded {len(licenses)} business licenses")
+            except Exception as e:
+                print(f"Error loading local data: {e}")
+            self.business_licenses = licenses
+    
+    def _build_license_index(self, licenses: List[Dict]):
+        """Parse license coordinates once and index them for radius queries"""
+        lats, lngs, rows = [], [], []
+        for row, biz in enumerate(licenses):
+            try:
+                biz_lat = float(biz.get('latitude', 0))
+                biz_lng = float(biz.get('longitude', 0))
+            except (ValueError, TypeError, AttributeError):
+                continue
+            if biz_lat == 0 or biz_lng == 0:
+                continue
+            lats.append(biz_lat)
+            lngs.append(biz_lng)
+            rows.append(row)
+        
+        self._license_index, self._license_rows = GridIndex(lats, lngs), rows
     
     def fetch_rent_listings(self, city: str = "New York", state: str = "NY", limit: int = 100) -> List[Dict]:
         """Fetch rental listings from RentCast API"""
         try:
             url = f"{RENTCAST_URL}?city={city}&state={state}&status=Active&limit={limit}"
             headers = {'X-Api-Key': RENTCAST_KEY, 'Accept': 'application/json'}
-            response = requests.get(url, headers=headers, timeout=10)
+            response = recorded('rentcast', {'url': url}, lambda: self._get_rentcast(url, headers))
             
-            if response.status_code == 200:
-                data = response.json()
+            if response['status_code'] == 200:
+                data = json.loads(response['text'])
                 listings = []
                 for item in (data if isinstance(data, list) else []):
                     listings.append({
@@ -67,15 +145,32 @@ class DataService:
                         'propertyType': item.get('propertyType', 'Commercial'),
                         'listingType': item.get('listingType', 'Rental'),
                     })
-                self.rent_listings = listings
+                self._set_rent_listings(listings)
                 return listings
             else:
-                print(f"RentCast API error: {response.status_code}")
+                print(f"RentCast API error: {response['status_code']}")
                 return self._get_mock_rent_listings()
         except Exception as e:
             print(f"Error fetching rent listings: {e}")
             return self._get_mock_rent_listings()
     
+    @staticmethod
+    def _get_rentcast(url: str, headers: Dict) -> Dict:
+        response = cached_get(url, 'rentcast', headers=headers, timeout=10)
+        return {'status_code': response.status_code, 'text': response.text}
+    
+    def _set_rent_listings(self, listings: List[Dict]):
+        """Replace the cached listings and rebuild their spatial index"""
+        lats, lngs, positions = [], [], []
+        for position, listing in enumerate(listings):
+            if listing.get('lat') and listing.get('lng'):
+                lats.append(listing['lat'])
+                lngs.append(listing['lng'])
+                positions.append(position)
+        
+        # One assignment, so concurrent readers never pair the new index with the old listings
+        self._rent_snapshot = (listings, GridIndex(lats, lngs), positions)
+    
     def _get_mock_rent_listings(self) -> List[Dict]:
         """Return mock commercial rental listings"""
         return [
@@ -106,111 +201,231 @@ class DataService:
             },
         ]
     
-    def get_vacant_spots(self, lat: float, lng: float, radius_miles: float = 0.5) -> List[Dict]:
-        """Get potentially vacant commercial spots from business licenses"""
-        vacant_spots = []
+    def get_vacant_spots(self, lat: float, lng: float, radius_miles: float = 0.5, limit: int = 20) -> List[Dict]:
+        """Get potentially vacant commercial spots from business licenses, nearest first"""
+        if self._business_licenses is None:
+            self._load_local_data()
+        matches = self._license_index.query_radius(lat, lng, radius_miles, limit=limit)
+        return [self._vacant_spot(distance, position) for distance, position in matches]
+    
+    def get_vacant_spots_batch(self, points: Sequence[Tuple[float, float]], radius_miles: float = 0.5, limit: int = 20) -> List[List[Dict]]:
+        """Get vacant spots for many (lat, lng) points in one call"""
+        if self._business_licenses is None:
+            self._load_local_data()
+        return [
+            [self._vacant_spot(distance, position) for distance, position in matches]
+            for matches in self._license_index.query_radius_batch(points, radius_miles, limit=limit)
+        ]
+    
+    def _vacant_spot(self, distance: float, position: int) -> Dict:
+        biz = self.business_licenses[self._license_rows[position]]
+        return {
+            'address': f"{biz.get('building', '')} {biz.get('street', '')}",
+            'lat': self._license_index.lats[position],
+            'lng': self._license_index.lngs[position],
+            'zipcode': biz.get('zipcode', ''),
+            'borough': biz.get('boro', ''),
+            'distance': round(distance, 2),
+        }
+    
+    def fetch_demographics(self, deadline: float = DEMOGRAPHICS_DEADLINE) -> Dict[str, Any]:
+        """Fetch demographics data from NYC Open Data and Census
         
-        # Filter business licenses near the location
-        for biz in self.business_licenses[:1000]:  # Limit for performance
-            try:
-                biz_lat = float(biz.get('latitude', 0))
-                biz_lng = float(biz.get('longitude', 0))
-                
-                if biz_lat == 0 or biz_lng == 0:
+        The three sources are fetched concurrently and share one deadline (seconds).
+        A source that fails or misses the deadline degrades to empty data on its own.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+        
+        sources = {
+            'neighborhoods': self._fetch_nta_shapes,
+            'population': self._fetch_population,
+            'census': self._fetch_census,
+        }
+        results = {'neighborhoods': None, 'population': {}, 'census': {}}
+        
+        expires_at = time.monotonic() + deadline
+        pool = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix='demographics')
+        try:
+            futures = {pool.submit(fetch, deadline): name for name, fetch in sources.items()}
+            for future in as_completed(futures, timeout=max(expires_at - time.monotonic(), 0)):
+                name = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    print(f"Error fetching {name} data: {e}")
                     continue
-                
-                # Calculate distance (simple approximation)
-                distance = ((biz_lat - lat) ** 2 + (biz_lng - lng) ** 2) ** 0.5 * 69  # Rough miles
-                
-                if distance <= radius_miles:
-                    vacant_spots.append({
-                        'address': f"{biz.get('building', '')} {biz.get('street', '')}",
-                        'lat': biz_lat,
-                        'lng': biz_lng,
-                        'zipcode': biz.get('zipcode', ''),
-                        'borough': biz.get('boro', ''),
-                        'distance': round(distance, 2),
-                    })
-            except (ValueError, TypeError):
-                continue
+                if data is not None:
+                    results[name] = data
+        except FuturesTimeout:
+            missing = [name for future, name in futures.items() if not future.done()]
+            print(f"Demographics deadline of {deadline}s exceeded, skipping: {', '.join(missing)}")
+        finally:
+            # Don't wait for stragglers; their results are simply dropped
+            pool.shutdown(wait=False, cancel_futures=True)
         
-        return vacant_spots[:20]  # Return top 20
+        if results['neighborhoods'] is not None:
+            self.neighborhoods = results['neighborhoods']
+        
+        self.demographics = {
+            'neighborhoods': self.neighborhoods,
+            'population': results['population'],
+            'census': results['census'],
+        }
+        if self.neighborhoods is not None:
+            # Rebuild the point-in-polygon engine from the refreshed shapes (swapped in when ready)
+            engine = self._new_demographics_engine(self.neighborhoods)
+            with self._demographics_lock:
+                self._demographics_engine = engine
+        return self.demographics
     
-    def fetch_demographics(self) -> Dict[str, Any]:
-        """Fetch demographics data from NYC Open Data and Census"""
-        try:
-            # Fetch neighborhood shapes
-            nta_url = f"{NTA_GEOJSON_URL}?$limit=500&$$app_token={NYC_TOKEN}"
-            nta_response = requests.get(nta_url, timeout=10)
-            if nta_response.status_code == 200:
-                self.neighborhoods = nta_response.json()
-            
-            # Fetch population data
-            pop_response = requests.get(POPULATION_URL, timeout=10)
-            population_data = {}
-            if pop_response.status_code == 200:
-                pop_data = pop_response.json()
-                for item in pop_data:
-                    nta_code = item.get('nta_code')
-                    if nta_code:
-                        population_data[nta_code] = {
-                            'population': item.get('population', 0),
-                            'density': item.get('density', 0),
+    async def fetch_demographics_async(self, deadline: float = DEMOGRAPHICS_DEADLINE) -> Dict[str, Any]:
+        """fetch_demographics for async callers (runs off the event loop)"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.fetch_demographics, deadline)
+    
+    def _fetch_nta_shapes(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Fetch neighborhood (NTA) shapes GeoJSON"""
+        nta_url = f"{NTA_GEOJSON_URL}?$limit=500&$$app_token={NYC_TOKEN}"
+        nta_response = cached_get(nta_url, 'nta_shapes', timeout=timeout)
+        if nta_response.status_code == 200:
+            return nta_response.json()
+        return None
+    
+    def _fetch_population(self, timeout: float) -> Dict[str, Any]:
+        """Fetch population and density keyed by NTA code"""
+        pop_response = cached_get(POPULATION_URL, 'population', timeout=timeout)
+        population_data = {}
+        if pop_response.status_code == 200:
+            pop_data = pop_response.json()
+            for item in pop_data:
+                nta_code = item.get('nta_code')
+                if nta_code:
+                    population_data[nta_code] = {
+                        'population': item.get('population', 0),
+                        'density': item.get('density', 0),
+                    }
+        return population_data
+    
+    def _fetch_census(self, timeout: float) -> Dict[str, Any]:
+        """Fetch county-level Census ACS figures"""
+        census_response = cached_get(CENSUS_URL, 'census', timeout=timeout)
+        census_data = {}
+        if census_response.status_code == 200:
+            # Parse census data (CSV format)
+            lines = census_response.text.strip().split('\n')
+            if len(lines) > 1:
+                headers = lines[0].split(',')
+                for line in lines[1:]:
+                    values = line.split(',')
+                    if len(values) >= len(headers):
+                        county = values[-1] if len(values) > 0 else ''
+                        census_data[county] = {
+                            'median_age': values[1] if len(values) > 1 else 0,
+                            'median_income': values[2] if len(values) > 2 else 0,
+                            'total_population': values[3] if len(values) > 3 else 0,
                         }
-            
-            # Fetch census data
-            census_response = requests.get(CENSUS_URL, timeout=10)
-            census_data = {}
-            if census_response.status_code == 200:
-                # Parse census data (CSV format)
-                lines = census_response.text.strip().split('\n')
-                if len(lines) > 1:
-                    headers = lines[0].split(',')
-                    for line in lines[1:]:
-                        values = line.split(',')
-                        if len(values) >= len(headers):
-                            county = values[-1] if len(values) > 0 else ''
-                            census_data[county] = {
-                                'median_age': values[1] if len(values) > 1 else 0,
-                                'median_income': values[2] if len(values) > 2 else 0,
-                                'total_population': values[3] if len(values) > 3 else 0,
-                            }
-            
-            self.demographics = {
-                'neighborhoods': self.neighborhoods,
-                'population': population_data,
-                'census': census_data,
-            }
-            
-            return self.demographics
-        except Exception as e:
-            print(f"Error fetching demographics: {e}")
-            return {}
+        return census_data
     
-    def get_location_demographics(self, lat: float, lng: float) -> Dict[str, Any]:
-        """Get demographics for a specific location"""
-        # This would ideally match the location to an NTA code
-        # For now, return average NYC demographics
-        return {
-            'median_income': 70000,
-            'median_age': 36,
-            'population_density': 27000,
-            'household_size': 2.5,
-        }
+    def _new_demographics_engine(self, neighborhoods: Dict[str, Any]) -> DemographicsEngine:
+        population = (self.demographics or {}).get('population')
+        engine = DemographicsEngine(neighborhoods, population=population)
+        print(f"Demographics engine ready with {len(engine)} neighborhoods")
+        return engine
     
-    def get_rent_prices_nearby(self, lat: float, lng: float, radius_miles: float = 0.5) -> List[Dict]:
-        """Get rent prices for listings near a location"""
-        nearby_listings = []
+    def _build_demographics_engine(self) -> Optional[DemographicsEngine]:
+        """Build the NTA/PUMA engine, fetching (cached) NTA shapes if needed
         
-        for listing in self.rent_listings:
-            if listing.get('lat') and listing.get('lng'):
-                distance = ((listing['lat'] - lat) ** 2 + (listing['lng'] - lng) ** 2) ** 0.5 * 69
-                if distance <= radius_miles:
-                    listing_copy = listing.copy()
-                    listing_copy['distance'] = round(distance, 2)
-                    nearby_listings.append(listing_copy)
+        Returns None when the shapes can't be fetched; the engine is then not
+        cached and the next attempt is scheduled with exponential backoff.
+        The fetch and the build run without holding _demographics_lock, which
+        only guards swapping in the finished engine.
+        """
+        if self._demographics_engine is not None:
+            return self._demographics_engine
+        neighborhoods = self.neighborhoods
+        if neighborhoods is None:
+            try:
+                neighborhoods = self._fetch_nta_shapes(timeout=DEMOGRAPHICS_DEADLINE)
+            except Exception as e:
+                print(f"Error fetching neighborhood shapes: {e}")
+        if neighborhoods is None:
+            with self._demographics_lock:
+                self._demographics_failures += 1
+                delay = min(DEMOGRAPHICS_RETRY_MAX, DEMOGRAPHICS_RETRY_BASE * 2 ** (self._demographics_failures - 1))
+                self._demographics_retry_at = time.monotonic() + delay
+            print(f"Neighborhood shapes unavailable, using citywide defaults (retry in {delay}s)")
+            return None
+        engine = self._new_demographics_engine(neighborhoods)
+        with self._demographics_lock:
+            self._demographics_failures = 0
+            if self.neighborhoods is None:
+                self.neighborhoods = neighborhoods
+            # An engine swapped in meanwhile by fetch_demographics has newer shapes
+            if self._demographics_engine is None:
+                self._demographics_engine = engine
+            return self._demographics_engine
+    
+    def _get_demographics_engine(self) -> DemographicsEngine:
+        """The NTA/PUMA engine, or a citywide-defaults engine until it is available
+        
+        Lookups never fetch shapes themselves: the engine is built by warm(), or in
+        a background thread started here (at most one at a time, respecting backoff).
+        """
+        engine = self._demographics_engine
+        if engine is not None:
+            return engine
+        if time.monotonic() >= self._demographics_retry_at and self._demographics_build_lock.acquire(blocking=False):
+            def build():
+                try:
+                    self._build_demographics_engine()
+                finally:
+                    self._demographics_build_lock.release()
+            threading.Thread(target=build, name='demographics-engine', daemon=True).start()
+        if self._fallback_demographics_engine is None:
+            self._fallback_demographics_engine = DemographicsEngine(None)
+        return self._fallback_demographics_engine
+    
+    def get_location_demographics(self, lat: float, lng: float) -> Dict[str, Any]:
+        """Get demographics for a specific location from its NTA and PUMA
         
-        return sorted(nearby_listings, key=lambda x: x.get('distance', 999))[:10]
+        Falls back to average NYC demographics outside known neighborhoods, and
+        while neighborhood shapes are still loading or unavailable.
+        """
+        return self._get_demographics_engine().lookup(lat, lng)
+    
+    def get_location_demographics_batch(self, points: Sequence[Tuple[float, float]]) -> List[Dict[str, Any]]:
+        """Get demographics for many (lat, lng) points in one call"""
+        return self._get_demographics_engine().lookup_batch(points)
+    
+    def get_rent_prices_nearby(self, lat: float, lng: float, radius_miles: float = 0.5, limit: int = 10) -> List[Dict]:
+        """Get rent prices for listings near a location, nearest first"""
+        listings, index, positions = self._rent_snapshot
+        return [
+            _with_distance(listings[positions[position]], distance)
+            for distance, position in index.query_radius(lat, lng, radius_miles, limit=limit)
+        ]
+    
+    def get_nearest_rent_listings(self, lat: float, lng: float, k: int = 10, max_radius_miles: Optional[float] = None) -> List[Dict]:
+        """Get the k listings closest to a location regardless of radius"""
+        listings, index, positions = self._rent_snapshot
+        return [
+            _with_distance(listings[positions[position]], distance)
+            for distance, position in index.nearest(lat, lng, k, max_radius_miles)
+        ]
+    
+    def get_rent_prices_nearby_batch(self, points: Sequence[Tuple[float, float]], radius_miles: float = 0.5, limit: int = 10) -> List[List[Dict]]:
+        """Get nearby rent prices for many (lat, lng) points in one call"""
+        listings, index, positions = self._rent_snapshot
+        return [
+            [_with_distance(listings[positions[position]], distance) for distance, position in matches]
+            for matches in index.query_radius_batch(points, radius_miles, limit=limit)
+        ]
+
+
+def _with_distance(listing: Dict, distance: float) -> Dict:
+    """Copy of a listing with its query distance (rounded miles)"""
+    return dict(listing, distance=round(distance, 2))
 
 
 # Global instance
@@ -0,0 +1,279 @@
+"""
+Point-in-polygon demographics lookup for NYC coordinates
+Matches a coordinate to its Neighborhood Tabulation Area (NTA) and joins the
+PUMA-level income/poverty figures from financial_by_neighbourhod.json.
+
+NTA polygons are loaded once into a bounding-box R-tree, and each polygon is
+"prepared" by bucketing its edges into horizontal bands, so a lookup only
+ray-casts against the handful of edges at the query's latitude.
+"""
+import json
+import re
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+FINANCIAL_DATA_FILE = Path(__file__).parent / 'agents' / 'data' / 'financial_by_neighbourhod.json'
+
+# Citywide averages returned when a coordinate falls outside every known NTA
+CITYWIDE_DEFAULTS = {
+    'median_income': 70000,
+    'median_age': 36,
+    'population_density': 27000,
+    'household_size': 2.5,
+}
+
+# Community district prefixes used by both the PUMA table and NTA cdta2020 codes
+BOROUGH_PREFIXES = ('BX', 'BK', 'MN', 'QN', 'SI')
+
+RTREE_NODE_CAPACITY = 8
+MAX_BANDS = 64
+
+
+class PreparedPolygon:
+    """(Multi)polygon with edges bucketed by latitude band for fast containment tests"""
+    __slots__ = ('min_x', 'min_y', 'max_x', 'max_y', '_x1', '_y1', '_x2', '_y2', '_band_height', '_bands')
+
+    def __init__(self, rings: Iterable[Sequence[Sequence[float]]]):
+        x1, y1, x2, y2 = array('d'), array('d'), array('d'), array('d')
+        for ring in rings:
+            for a, b in zip(ring, list(ring[1:]) + [ring[0]]):
+                ax, ay, bx, by = a[0], a[1], b[0], b[1]
+                if ay == by:
+                    continue  # Horizontal edges never cross a horizontal ray
+                x1.append(ax)
+                y1.append(ay)
+                x2.append(bx)
+                y2.append(by)
+        self._x1, self._y1, self._x2, self._y2 = x1, y1, x2, y2
+
+        xs = list(x1) + list(x2)
+        ys = list(y1) + list(y2)
+        if not xs:
+            self.min_x = self.min_y = float('inf')
+            self.max_x = self.max_y = float('-inf')
+            self._band_height = 1.0
+            self._bands = []
+            return
+        self.min_x, self.max_x = min(xs), max(xs)
+        self.min_y, self.max_y = min(ys), max(ys)
+
+        band_count = max(1, min(MAX_BANDS, len(x1) // 8))
+        self._band_height = (self.max_y - self.min_y) / band_count or 1.0
+        self._bands = [array('i') for _ in range(band_count)]
+        for i in range(len(x1)):
+            lo = self._band(min(y1[i], y2[i]))
+            hi = self._band(max(y1[i], y2[i]))
+            for band in range(lo, hi + 1):
+                self._bands[band].append(i)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self._bands
+
+    def _band(self, y: float) -> int:
+        band = int((y - self.min_y) / self._band_height)
+        return min(max(band, 0), len(self._bands) - 1)
+
+    def contains(self, x: float, y: float) -> bool:
+        """Even-odd ray casting against the edges in the point's latitude band"""
+        if not (self.min_x <= x <= self.max_x and self.min_y <= y <= self.max_y):
+            return False
+        x1, y1, x2, y2 = self._x1, self._y1, self._x2, self._y2
+        inside = False
+        for i in self._bands[self._band(y)]:
+            ay, by = y1[i], y2[i]
+            if (ay > y) != (by > y):
+                if x < x1[i] + (y - ay) * (x2[i] - x1[i]) / (by - ay):
+                    inside = not inside
+        return inside
+
+
+class BoundingBoxRTree:
+    """Static R-tree over bounding boxes, bulk-loaded with Sort-Tile-Recursive packing"""
+
+    def __init__(self, boxes: Sequence[Tuple[float, float, float, float]], capacity: int = RTREE_NODE_CAPACITY):
+        # Leaf entries are (min_x, min_y, max_x, max_y, item_id)
+        level = [(b[0], b[1], b[2], b[3], i) for i, b in enumerate(boxes)]
+        self._root = None
+        self._capacity = capacity
+        if not level:
+            return
+
+        is_leaf = True
+        while True:
+            nodes = self._pack(level, is_leaf)
+            if len(nodes) == 1:
+                self._root = nodes[0]
+                return
+            level, is_leaf = nodes, False
+
+    def _pack(self, entries, is_leaf):
+        """Group entries into parent nodes: (min_x, min_y, max_x, max_y, is_leaf, children)"""
+        capacity = self._capacity
+        node_count = -(-len(entries) // capacity)
+        slices = max(1, int(node_count ** 0.5 + 0.999))
+        per_slice = slices * capacity
+
+        entries = sorted(entries, key=lambda e: e[0] + e[2])
+        nodes = []
+        for s in range(0, len(entries), per_slice):
+            vertical = sorted(entries[s:s + per_slice], key=lambda e: e[1] + e[3])
+            for n in range(0, len(vertical), capacity):
+                children = vertical[n:n + capacity]
+                nodes.append((
+                    min(c[0] for c in children),
+                    min(c[1] for c in children),
+                    max(c[2] for c in children),
+                    max(c[3] for c in children),
+                    is_leaf,
+                    children,
+                ))
+        return nodes
+
+    def query_point(self, x: float, y: float) -> List[int]:
+        """Ids of all boxes containing the point"""
+        if self._root is None:
+            return []
+        hits = []
+        stack = [self._root]
+        while stack:
+            min_x, min_y, max_x, max_y, is_leaf, children = stack.pop()
+            if not (min_x <= x <= max_x and min_y <= y <= max_y):
+                continue
+            if is_leaf:
+                hits.extend(c[4] for c in children if c[0] <= x <= c[2] and c[1] <= y <= c[3])
+            else:
+                stack.extend(children)
+        return hits
+
+
+def _parse_number(value: Any) -> Optional[float]:
+    try:
+        return float(str(value).replace(',', ''))
+    except (TypeError, ValueError):
+        return None
+
+
+def _district_codes(cd_label: str) -> List[str]:
+    """'BX Community Districts 3 & 6' -> ['BX03', 'BX06']"""
+    prefix = cd_label[:2].upper()
+    if prefix not in BOROUGH_PREFIXES:
+        return []
+    return [f"{prefix}{int(n):02d}" for n in re.findall(r'\d+', cd_label)]
+
+
+def load_puma_table(path: Path = FINANCIAL_DATA_FILE) -> Dict[str, Dict[str, Any]]:
+    """PUMA income/poverty figures keyed by community district code (e.g. 'MN03')"""
+    try:
+        with open(path, 'r') as f:
+            rows = json.load(f)
+    except Exception as e:
+        print(f"Error loading PUMA financial data: {e}")
+        return {}
+
+    table = {}
+    for row in rows:
+        record = {
+            'puma': row.get('PUMA'),
+            'puma_neighborhoods': row.get('Neighborhoods', ''),
+            'median_income': _parse_number(row.get('Median_Income')),
+            'poverty_rate': _parse_number(row.get('NYC_Poverty_Rate')),
+            'perc_white': _parse_number(row.get('Perc_White')),
+            'perc_black': _parse_number(row.get('Perc_Black')),
+            'perc_asian': _parse_number(row.get('Perc_Asian')),
+            'perc_hispanic': _parse_number(row.get('Perc_Hispanic')),
+            'perc_other': _parse_number(row.get('Perc_Other')),
+        }
+        # Rows repeat once per goal/indicator; the PUMA figures are identical
+        for code in _district_codes(row.get('CD', '')):
+            table.setdefault(code, record)
+    return table
+
+
+def _polygon_rings(geometry: Dict[str, Any]) -> List[Sequence[Sequence[float]]]:
+    if not geometry:
+        return []
+    if geometry.get('type') == 'Polygon':
+        return list(geometry.get('coordinates') or [])
+    if geometry.get('type') == 'MultiPolygon':
+        return [ring for polygon in geometry.get('coordinates') or [] for ring in polygon]
+    return []
+
+
+class DemographicsEngine:
+    """Coordinate -> NTA -> PUMA demographics lookup"""
+
+    def __init__(
+        self,
+        nta_geojson: Optional[Dict[str, Any]],
+        puma_table: Optional[Dict[str, Dict[str, Any]]] = None,
+        population: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        puma_table = load_puma_table() if puma_table is None else puma_table
+        population = population or {}
+
+        self._polygons: List[PreparedPolygon] = []
+        # O(1) table of fully joined demographics per NTA, indexed like _polygons
+        self._records: List[Dict[str, Any]] = []
+
+        for feature in (nta_geojson or {}).get('features', []) or []:
+            if not feature:
+                continue
+            polygon = PreparedPolygon(_polygon_rings(feature.get('geometry')))
+            if polygon.is_empty:
+                continue
+            props = feature.get('properties') or {}
+            self._polygons.append(polygon)
+            self._records.append(self._join(props, puma_table, population))
+
+        self._rtree = BoundingBoxRTree([(p.min_x, p.min_y, p.max_x, p.max_y) for p in self._polygons])
+
+    def __len__(self) -> int:
+        return len(self._polygons)
+
+    @staticmethod
+    def _join(props, puma_table, population) -> Dict[str, Any]:
+        nta_code = props.get('nta2020') or props.get('ntacode') or ''
+        district = (props.get('cdta2020') or '').upper()
+        puma = puma_table.get(district, {})
+        pop = population.get(nta_code, {})
+
+        record = dict(CITYWIDE_DEFAULTS)
+        record.update({
+            'nta_code': nta_code,
+            'nta_name': props.get('ntaname', ''),
+            'borough': props.get('boroname', ''),
+            'community_district': district,
+            'puma': puma.get('puma'),
+            'puma_neighborhoods': puma.get('puma_neighborhoods', ''),
+            'poverty_rate': puma.get('poverty_rate'),
+            'data_source': 'nta_puma' if puma else 'nta',
+        })
+        if puma.get('median_income'):
+            record['median_income'] = int(puma['median_income'])
+        for key in ('perc_white', 'perc_black', 'perc_asian', 'perc_hispanic', 'perc_other'):
+            if puma.get(key) is not None:
+                record[key] = puma[key]
+        density = _parse_number(pop.get('density'))
+        if density:
+            record['population_density'] = density
+        return record
+
+    def match(self, lat: float, lng: float) -> Optional[int]:
+        """Index of the NTA containing the coordinate, or None"""
+        for i in self._rtree.query_point(lng, lat):
+            if self._polygons[i].contains(lng, lat):
+                return i
+        return None
+
+    def lookup(self, lat: float, lng: float) -> Dict[str, Any]:
+        """Demographics for a coordinate (citywide averages outside every NTA)"""
+        i = self.match(lat, lng)
+        if i is None:
+            return dict(CITYWIDE_DEFAULTS, data_source='citywide_average')
+        return dict(self._records[i])
+
+    def lookup_batch(self, points: Sequence[Tuple[float, float]]) -> List[Dict[str, Any]]:
+        """lookup() for many (lat, lng) points in one call"""
+        return [self.lookup(lat, lng) for lat, lng in points]
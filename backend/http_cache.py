@@ -0,0 +1,226 @@
+"""
+Shared HTTP session and on-disk response cache for DataService fetchers
+
+All fetchers go through one pooled requests.Session with retry/backoff.
+Successful responses are stored content-addressed on disk (bodies are
+keyed by their SHA-256, metadata by the request URL) and served without
+touching the network until the per-source TTL expires. After that the
+origin is revalidated with ETag / If-Modified-Since, so unchanged sources
+cost a 304 instead of a full download. When a URL's body changes, the blob it
+replaced is deleted unless another URL's entry still references it.
+
+agents/http_stub_server.py serves revalidatable bodies for testing.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Cache location (override with VANTAGE_HTTP_CACHE_DIR)
+CACHE_DIR = Path(os.getenv('VANTAGE_HTTP_CACHE_DIR', Path(__file__).parent / '.cache' / 'http'))
+
+# Seconds a cached response is served without contacting the origin, per source
+SOURCE_TTLS = {
+    'nta_shapes': 30 * 24 * 3600,   # Neighborhood boundaries change with the decennial census
+    'population': 30 * 24 * 3600,   # NTA population tables are published yearly
+    'census': 30 * 24 * 3600,       # ACS 5-year estimates are published yearly
+    'rentcast': 6 * 3600,           # Active listings turn over daily
+}
+DEFAULT_TTL = 24 * 3600
+
+# Connection pool and retry policy for the shared session
+POOL_SIZE = int(os.getenv('VANTAGE_HTTP_POOL_SIZE', '10'))
+MAX_RETRIES = int(os.getenv('VANTAGE_HTTP_MAX_RETRIES', '3'))
+RETRY_BACKOFF = float(os.getenv('VANTAGE_HTTP_RETRY_BACKOFF', '0.5'))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide pooled session (created on first use)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                retry = Retry(
+                    total=MAX_RETRIES,
+                    backoff_factor=RETRY_BACKOFF,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=frozenset(['GET', 'HEAD']),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response backed by the cache"""
+
+    def __init__(self, status_code: int, content: bytes, headers: Optional[Dict[str, str]] = None, from_cache: bool = False):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+def _atomic_write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _meta_path(url: str) -> Path:
+    return CACHE_DIR / 'meta' / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+
+def _blob_path(digest: str) -> Path:
+    return CACHE_DIR / 'blobs' / digest[:2] / digest
+
+
+def _read_cached(url: str):
+    """Return (meta, body) for a cached URL, or (None, None)"""
+    try:
+        with open(_meta_path(url), 'r') as f:
+            meta = json.load(f)
+        with open(_blob_path(meta['body']), 'rb') as f:
+            return meta, f.read()
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def _blob_referenced(digest: str) -> bool:
+    """Whether any cached URL's metadata still points at the blob"""
+    for path in (CACHE_DIR / 'meta').glob('*.json'):
+        try:
+            with open(path, 'r') as f:
+                if json.load(f).get('body') == digest:
+                    return True
+        except (OSError, ValueError):
+            continue
+    return False
+
+
+def _release_blob(digest: str):
+    """Delete a blob no cached URL references any more"""
+    if not _blob_referenced(digest):
+        try:
+            _blob_path(digest).unlink()
+        except OSError:
+            pass
+
+
+def _store(url: str, source: str, response, previous: Optional[str] = None) -> Dict[str, Any]:
+    """Write the body blob and the URL's metadata; previous is the digest being replaced"""
+    body = response.content
+    digest = hashlib.sha256(body).hexdigest()
+    blob = _blob_path(digest)
+    if not blob.exists():
+        _atomic_write(blob, body)
+    meta = {
+        'url': url,
+        'source': source,
+        'body': digest,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'content_type': response.headers.get('Content-Type'),
+        'fetched_at': time.time(),
+    }
+    _atomic_write(_meta_path(url), json.dumps(meta).encode())
+    if previous and previous != digest:
+        _release_blob(previous)
+    return meta
+
+
+def _touch(url: str, meta: Dict[str, Any]):
+    meta['fetched_at'] = time.time()
+    _atomic_write(_meta_path(url), json.dumps(meta).encode())
+
+
+def cached_get(
+    url: str,
+    source: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 10,
+    ttl: Optional[float] = None,
+) -> CachedResponse:
+    """
+    GET a URL through the shared session and the disk cache
+
+    Args:
+        url: Full request URL (the cache key)
+        source: Source name used to pick the TTL from SOURCE_TTLS
+        headers: Extra request headers (not part of the cache key)
+        timeout: Per-request timeout in seconds
+        ttl: Override the source TTL in seconds (0 always revalidates)
+
+    Returns:
+        CachedResponse; from_cache is True when the body came from disk
+    """
+    ttl = SOURCE_TTLS.get(source, DEFAULT_TTL) if ttl is None else ttl
+    meta, body = _read_cached(url)
+    content_headers = {'Content-Type': meta.get('content_type') or ''} if meta else {}
+
+    if meta and time.time() - meta.get('fetched_at', 0) < ttl:
+        return CachedResponse(200, body, content_headers, from_cache=True)
+
+    request_headers = dict(headers or {})
+    if meta:
+        if meta.get('etag'):
+            request_headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            request_headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        response = get_session().get(url, headers=request_headers, timeout=timeout)
+    except Exception as e:
+        if meta:
+            print(f"Serving stale {source} data after request error: {e}")
+            return CachedResponse(200, body, content_headers, from_cache=True)
+        raise
+
+    if response.status_code == 304 and meta:
+        _touch(url, meta)
+        return CachedResponse(200, body, content_headers, from_cache=True)
+
+    if response.status_code == 200:
+        try:
+            _store(url, source, response, previous=meta.get('body') if meta else None)
+        except OSError as e:
+            print(f"Warning: could not cache {source} response: {e}")
+        return CachedResponse(200, response.content, dict(response.headers))
+
+    if meta:
+        print(f"Serving stale {source} data after HTTP {response.status_code}")
+        return CachedResponse(200, body, content_headers, from_cache=True)
+    return CachedResponse(response.status_code, response.content, dict(response.headers))
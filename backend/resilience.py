@@ -0,0 +1,269 @@
+"""
+Latency budgets, circuit breaking and hedged requests for third-party APIs
+
+A Deadline is created when a request arrives and passed down, so each
+upstream call gets the time the request has left (capped per service)
+instead of a fixed timeout. Every service has a Resilience wrapper holding a
+CircuitBreaker: after repeated failures it opens and calls fail fast with
+CircuitOpenError (callers take their fallback path) until a trial call
+succeeds. With hedging enabled, a second identical request is started when
+the first one is slower than the service's observed p95 latency, and the
+first to succeed wins.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar, Union
+
+T = TypeVar('T')
+
+
+class CircuitOpenError(RuntimeError):
+    """The service's circuit breaker is open; use the fallback path"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before the call could start"""
+
+
+class Deadline:
+    """Absolute point in time by which a request must be answered"""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def coerce(cls, value: Union['Deadline', float, None], default: float) -> 'Deadline':
+        """Deadline from a Deadline, a number of seconds, or None (default seconds)"""
+        if isinstance(value, Deadline):
+            return value
+        return cls(default if value is None else value)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def budget(self, cap: Optional[float] = None) -> float:
+        """Seconds a call may take: the time left, at most cap"""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after failure_threshold consecutive failures; open -> half-open
+    after reset_timeout seconds, where one trial call decides whether it closes again
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.short_circuits = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now"""
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'closed':
+                return True
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.short_circuits += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def release(self):
+        """Free a half-open trial slot without recording an outcome"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == 'half_open' or self.consecutive_failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.times_opened += 1
+                    print(f"⚠️  Circuit breaker '{self.name}' opened after {self.consecutive_failures} failures")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'times_opened': self.times_opened,
+            'short_circuits': self.short_circuits,
+        }
+
+
+class LatencyTracker:
+    """Rolling window of successful call durations"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+class Resilience:
+    """Breaker, latency budget and optional hedging around one upstream service"""
+
+    def __init__(
+        self,
+        name: str,
+        timeout_cap: Optional[float] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        hedge: bool = False,
+        hedge_percentile: float = 95,
+        hedge_min_samples: int = 20,
+    ):
+        self.name = name
+        self.timeout_cap = timeout_cap
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.latency = LatencyTracker()
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.calls = 0
+        self.failures = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge or len(self.latency) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    def _start(self, deadline: Optional[Deadline]) -> float:
+        """Check the breaker and return the call's time budget"""
+        budget = deadline.budget(self.timeout_cap) if deadline is not None else self.timeout_cap
+        if budget is not None and budget <= 0:
+            raise DeadlineExceeded(f"No time left for {self.name}")
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        self.calls += 1
+        return budget
+
+    def _finish(self, started: float, error: Optional[BaseException]):
+        if error is None:
+            self.latency.observe(time.monotonic() - started)
+            self.breaker.record_success()
+        else:
+            self.failures += 1
+            self.breaker.record_failure()
+
+    def _timeout_is_upstream(self, budget: Optional[float]) -> bool:
+        """
+        Whether a timed-out call is the service's fault: it had its full cap, or
+        the caller's shorter budget was still above the service's usual p95
+        """
+        if budget is None or self.timeout_cap is None or budget >= self.timeout_cap:
+            return True
+        p95 = self.latency.percentile(95)
+        return p95 is not None and budget >= p95
+
+    async def call_async(self, call: Callable[[], Awaitable[T]], deadline: Optional[Deadline] = None) -> T:
+        """
+        Await call() within the deadline's budget
+
+        Raises:
+            CircuitOpenError: The breaker is open (nothing was sent)
+            DeadlineExceeded: The deadline had already passed
+            asyncio.TimeoutError: The call did not finish within its budget
+
+        Cancellation and timeouts caused by a caller's short deadline are not
+        counted as service failures.
+        """
+        budget = self._start(deadline)
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(self._hedged_async(call), budget)
+        except asyncio.CancelledError:
+            # The caller gave up (e.g. its own deadline); says nothing about the service
+            self.breaker.release()
+            raise
+        except asyncio.TimeoutError as e:
+            if self._timeout_is_upstream(budget):
+                self._finish(started, e)
+            else:
+                self.breaker.release()
+            raise
+        except Exception as e:
+            self._finish(started, e)
+            raise
+        self._finish(started, None)
+        return result
+
+    async def _hedged_async(self, call: Callable[[], Awaitable[T]]) -> T:
+        delay = self._hedge_delay()
+        first = asyncio.ensure_future(call())
+        if delay is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        self.hedges += 1
+        second = asyncio.ensure_future(call())
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            'breaker': self.breaker.stats(),
+            'calls': self.calls,
+            'failures': self.failures,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+        }
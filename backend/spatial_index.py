@@ -0,0 +1,186 @@
+"""
+Grid-based spatial index for point datasets
+Coordinates are kept in compact typed arrays and bucketed into fixed-size
+lat/lng cells, so radius and nearest-neighbour queries only look at the
+cells that can contain a match instead of scanning every record
+"""
+from array import array
+from heapq import nsmallest
+from math import radians, cos, sin, asin, sqrt, floor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Rough miles per degree used by the original DataService distance approximation
+MILES_PER_DEGREE = 69
+EARTH_RADIUS_MILES = 3959
+
+# Default cell size in degrees (~0.35 miles north-south)
+DEFAULT_CELL_SIZE = 0.005
+
+
+def planar_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Flat-earth distance in rough miles (degrees * 69), as used by DataService"""
+    return ((lat2 - lat1) ** 2 + (lng2 - lng1) ** 2) ** 0.5 * MILES_PER_DEGREE
+
+
+def haversine_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great circle distance in miles between two points in decimal degrees"""
+    lng1, lat1, lng2, lat2 = map(radians, [lng1, lat1, lng2, lat2])
+    dlng = lng2 - lng1
+    dlat = lat2 - lat1
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlng / 2) ** 2
+    return EARTH_RADIUS_MILES * 2 * asin(sqrt(a))
+
+
+METRICS = {
+    'planar': planar_miles,
+    'haversine': haversine_miles,
+}
+
+
+class GridIndex:
+    """Static spatial index over (lat, lng) points with radius and k-nearest queries
+
+    Query results are (distance_miles, position) tuples where position is the
+    index of the point in the sequences the index was built from.
+    """
+
+    def __init__(
+        self,
+        lats: Iterable[float],
+        lngs: Iterable[float],
+        cell_size: float = DEFAULT_CELL_SIZE,
+        metric: str = 'planar',
+    ):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {sorted(METRICS)}")
+        self.lats = array('d', lats)
+        self.lngs = array('d', lngs)
+        if len(self.lats) != len(self.lngs):
+            raise ValueError("lats and lngs must have the same length")
+        self.cell_size = cell_size
+        self.metric = metric
+        self._distance = METRICS[metric]
+        self._cells: Dict[Tuple[int, int], array] = {}
+
+        for i, (lat, lng) in enumerate(zip(self.lats, self.lngs)):
+            key = self._cell(lat, lng)
+            bucket = self._cells.get(key)
+            if bucket is None:
+                bucket = self._cells[key] = array('i')
+            bucket.append(i)
+
+        # Bounding box of the data (used by nearest() to bound its search)
+        if self.lats:
+            self._bbox = (min(self.lats), min(self.lngs), max(self.lats), max(self.lngs))
+            self._cell_min = self._cell(self._bbox[0], self._bbox[1])
+            self._cell_max = self._cell(self._bbox[2], self._bbox[3])
+        else:
+            self._bbox = None
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def _reach(self, lat: float, lng: float) -> float:
+        """Radius around (lat, lng) that covers every point: distance to the farthest bbox corner, plus a cell of slack"""
+        min_lat, min_lng, max_lat, max_lng = self._bbox
+        farthest = max(
+            self._distance(lat, lng, corner_lat, corner_lng)
+            for corner_lat in (min_lat, max_lat)
+            for corner_lng in (min_lng, max_lng)
+        )
+        return farthest + 2 * self.cell_size * MILES_PER_DEGREE
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return floor(lat / self.cell_size), floor(lng / self.cell_size)
+
+    def _window(self, lat: float, radius_miles: float) -> Tuple[float, float]:
+        """Half-size in degrees of the box that contains every point within the radius"""
+        if self.metric == 'planar':
+            half = radius_miles / MILES_PER_DEGREE
+            return half, half
+        # One degree of latitude is ~69.1 miles; 69 keeps the window slightly conservative
+        dlat = radius_miles / MILES_PER_DEGREE
+        edge_lat = min(abs(lat) + dlat, 89.9)
+        return dlat, radius_miles / (MILES_PER_DEGREE * cos(radians(edge_lat)))
+
+    def _candidates(self, lat: float, lng: float, radius_miles: float) -> Iterable[int]:
+        dlat, dlng = self._window(lat, radius_miles)
+        if self._bbox is None:
+            return
+        row_min, col_min = self._cell(lat - dlat, lng - dlng)
+        row_max, col_max = self._cell(lat + dlat, lng + dlng)
+        # Cells outside the data's bounding box are empty; don't walk them
+        row_min, col_min = max(row_min, self._cell_min[0]), max(col_min, self._cell_min[1])
+        row_max, col_max = min(row_max, self._cell_max[0]), min(col_max, self._cell_max[1])
+        cells = self._cells
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                bucket = cells.get((row, col))
+                if bucket is not None:
+                    yield from bucket
+
+    def query_radius(
+        self,
+        lat: float,
+        lng: float,
+        radius_miles: float,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[float, int]]:
+        """All points within radius_miles, nearest first (optionally only the nearest `limit`)"""
+        distance = self._distance
+        lats, lngs = self.lats, self.lngs
+        matches = []
+        for i in self._candidates(lat, lng, radius_miles):
+            d = distance(lat, lng, lats[i], lngs[i])
+            if d <= radius_miles:
+                matches.append((d, i))
+
+        if limit is not None and limit < len(matches):
+            return nsmallest(limit, matches)
+        matches.sort()
+        return matches
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 1,
+        max_radius_miles: Optional[float] = None,
+    ) -> List[Tuple[float, int]]:
+        """The k nearest points, nearest first, optionally bounded by max_radius_miles"""
+        if k <= 0 or not self.lats:
+            return []
+
+        limit = self._reach(lat, lng) if max_radius_miles is None else max_radius_miles
+        radius = min(self.cell_size * MILES_PER_DEGREE, limit)
+        while True:
+            matches = self.query_radius(lat, lng, radius, limit=k)
+            # Every point closer than `radius` has been seen, so k hits are the k nearest
+            if len(matches) >= k or radius >= limit:
+                break
+            radius = min(radius * 2, limit)
+
+        if max_radius_miles is None and len(matches) < min(k, len(self.lats)):
+            # The reach estimate fell short (e.g. haversine near the poles): scan everything
+            distance = self._distance
+            lats, lngs = self.lats, self.lngs
+            matches = nsmallest(k, ((distance(lat, lng, lats[i], lngs[i]), i) for i in range(len(lats))))
+        return matches
+
+    def query_radius_batch(
+        self,
+        points: Sequence[Tuple[float, float]],
+        radius_miles: float,
+        limit: Optional[int] = None,
+    ) -> List[List[Tuple[float, int]]]:
+        """query_radius for many (lat, lng) points in one call"""
+        return [self.query_radius(lat, lng, radius_miles, limit) for lat, lng in points]
+
+    def nearest_batch(
+        self,
+        points: Sequence[Tuple[float, float]],
+        k: int = 1,
+        max_radius_miles: Optional[float] = None,
+    ) -> List[List[Tuple[float, int]]]:
+        """nearest() for many (lat, lng) points in one call"""
+        return [self.nearest(lat, lng, k, max_radius_miles) for lat, lng in points]
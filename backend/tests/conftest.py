@@ -0,0 +1,40 @@
+# conftest.py
+"""
+Shared pytest setup: backend modules are imported the way the agents import
+them, from backend/ and backend/agents/ on sys.path
+"""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path[:0] = [str(BACKEND_DIR), str(BACKEND_DIR / 'agents')]
+
+
+@pytest.fixture
+def serve():
+    """Run aiohttp apps on a background loop; returns start(app) -> base URL"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    runners = []
+
+    async def start_app(app):
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        runners.append(runner)
+        return f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+    yield lambda app: asyncio.run_coroutine_threadsafe(start_app(app), loop).result()
+
+    for runner in runners:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
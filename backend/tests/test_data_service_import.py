@@ -0,0 +1,39 @@
+# test_data_service_import.py
+"""
+Importing data_service must stay cheap: datasets load on first use and
+requests is imported by the fetchers, not at module import
+"""
+import os
+import re
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR
+
+# Cumulative import time allowed for data_service (~30 ms lazy, ~200 ms eager)
+IMPORT_BUDGET_MS = float(os.getenv('VANTAGE_IMPORT_BUDGET_MS', '100'))
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, '-c', code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+
+
+def test_import_loads_nothing():
+    result = _run(
+        "import sys, data_service\n"
+        "print('requests' in sys.modules, data_service.data_service._business_licenses is None)"
+    )
+    assert result.stdout.split() == ['False', 'True']
+
+
+def test_import_time_budget():
+    # Best of three, so a slow first run (cold page cache) doesn't fail the check
+    times = []
+    for _ in range(3):
+        stderr = _run('import data_service', '-X', 'importtime').stderr
+        match = re.search(r'^import time:\s+\d+ \|\s+(\d+) \| data_service$', stderr, re.MULTILINE)
+        assert match, stderr
+        times.append(int(match.group(1)) / 1000)
+    assert min(times) < IMPORT_BUDGET_MS, f"data_service import took {min(times):.1f} ms"
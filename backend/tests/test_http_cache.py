@@ -0,0 +1,50 @@
+# test_http_cache.py
+"""
+http_cache against the local stub origin (agents/http_stub_server.py):
+retries, disk hits, revalidation and blob cleanup
+"""
+import pytest
+import requests
+
+import http_cache
+from http_stub_server import create_app
+
+
+@pytest.fixture
+def origin(serve, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, 'CACHE_DIR', tmp_path)
+    monkeypatch.setattr(http_cache, 'RETRY_BACKOFF', 0)
+    monkeypatch.setattr(http_cache, '_session', None)
+    yield serve(create_app(fail_first=2))
+    if http_cache._session is not None:
+        http_cache._session.close()
+
+
+def stats(origin):
+    return requests.get(f"{origin}/_stats").json()
+
+
+def test_retries_then_serves_from_disk(origin):
+    url = f"{origin}/population.json"
+    first = http_cache.cached_get(url, 'population')
+    assert first.status_code == 200 and not first.from_cache
+    assert stats(origin) == {'/population.json requests': 3, '/population.json 503': 2, '/population.json 200': 1}
+
+    second = http_cache.cached_get(url, 'population')
+    assert second.from_cache and second.content == first.content
+    assert stats(origin)['/population.json requests'] == 3
+
+
+def test_revalidates_and_releases_replaced_blob(origin, tmp_path):
+    url = f"{origin}/rentcast.json"
+    first = http_cache.cached_get(url, 'rentcast')
+
+    revalidated = http_cache.cached_get(url, 'rentcast', ttl=0)
+    assert revalidated.from_cache and revalidated.content == first.content
+    assert stats(origin)['/rentcast.json 304'] == 1
+
+    requests.put(url, data=b'{"version": 2}')
+    updated = http_cache.cached_get(url, 'rentcast', ttl=0)
+    assert not updated.from_cache and updated.content == b'{"version": 2}'
+    blobs = [path for path in (tmp_path / 'blobs').rglob('*') if path.is_file()]
+    assert [path.read_bytes() for path in blobs] == [b'{"version": 2}']
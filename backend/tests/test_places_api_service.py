@@ -0,0 +1,65 @@
+# test_places_api_service.py
+"""
+Async Places client against places_stub_server.py: the semaphore bounds the
+searches in flight and the caller's deadline bounds the wait
+"""
+import asyncio
+
+import pytest
+from aiohttp import web
+
+import places_api_service
+from places_stub_server import NEARBY_SEARCH_PATH, create_app
+
+MAX_CONCURRENCY = 3
+
+
+@pytest.fixture
+def places(serve, monkeypatch):
+    """Stub URL and a dict tracking the most searches it saw at once"""
+    seen = {'in_flight': 0, 'max_in_flight': 0, 'requests': 0}
+
+    @web.middleware
+    async def track(request, handler):
+        seen['requests'] += 1
+        seen['in_flight'] += 1
+        seen['max_in_flight'] = max(seen['max_in_flight'], seen['in_flight'])
+        try:
+            return await handler(request)
+        finally:
+            seen['in_flight'] -= 1
+
+    app = create_app(latency=0.1)
+    app.middlewares.append(track)
+    base = serve(app)
+    monkeypatch.setattr(places_api_service, 'GOOGLE_PLACES_API_URL', base + NEARBY_SEARCH_PATH)
+    monkeypatch.setattr(places_api_service, 'GOOGLE_PLACES_API_KEY', 'stub')
+    monkeypatch.setattr(places_api_service, 'PLACES_MAX_CONCURRENCY', MAX_CONCURRENCY)
+    monkeypatch.setattr(places_api_service, 'PLACES_CACHE_TTL', 0)
+    monkeypatch.setattr(places_api_service, '_session', None)
+    return seen
+
+
+async def _search_all(searches):
+    try:
+        return await asyncio.gather(*(
+            places_api_service.get_nearby_competitors(lat, -73.95, 'cafe', 1000, deadline)
+            for lat, deadline in searches
+        ))
+    finally:
+        await places_api_service.close_session()
+
+
+def test_concurrency_bound(places):
+    results = asyncio.run(_search_all([(40.70 + i * 0.01, None) for i in range(12)]))
+    assert places['requests'] == 12
+    assert places['max_in_flight'] == MAX_CONCURRENCY
+    assert all(isinstance(competitors, list) for competitors in results)
+    assert any(results)
+
+
+def test_deadline_covers_slot_wait(places):
+    # Three searches hold the slots for ~0.1 s; the fourth caller's 0.05 s deadline ends first
+    results = asyncio.run(_search_all([(40.70 + i * 0.01, None) for i in range(3)] + [(40.80, 0.05)]))
+    assert any(results[:3])
+    assert results[3] == []